@@ -0,0 +1,4 @@
+#!/bin/sh
+# Permite conexiones de replicación desde la red de compose.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,13 @@
+#!/bin/sh
+# Clona el primario la primera vez y arranca como réplica en streaming
+# (pg_basebackup -R deja standby.signal y primary_conninfo).
+set -e
+PGDATA=${PGDATA:-/var/lib/postgresql/data}
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h db -U user; do sleep 1; done
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    su-exec postgres pg_basebackup -h db -U user -D "$PGDATA" -R -X stream
+fi
+exec docker-entrypoint.sh postgres
@@ -0,0 +1,143 @@
+"""
+Estadísticas diarias por curso para los instructores (CourseDailyStats).
+
+El comando `rollup_course_stats` solo recalcula los días afectados por
+inscripciones y comentarios creados o modificados desde la última ejecución
+(Watermark sobre `updated_at`): cada (curso, día) tocado se vuelve a agregar
+entero desde las tablas de origen, así que el resultado es exacto aunque una
+fila se modifique varias veces. Los borrados y el curso anterior de una fila
+movida no dejan un updated_at nuevo; las señales los anotan en
+StaleCourseDay y la ejecución siguiente los recalcula y los borra. `--full`
+reconstruye la tabla.
+
+La API lee solo de CourseDailyStats.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Comment, CourseDailyStats, Enrollment, StaleCourseDay, Watermark
+
+WATERMARK = "course_daily_stats"
+STAT_FIELDS = ("enrollments", "completed", "canceled", "rating_sum", "rating_count")
+
+
+def _enrollment_rows(queryset):
+    return (
+        queryset.annotate(day=TruncDate("enrolled_at"))
+        .values("course_id", "day")
+        .annotate(
+            enrollments=Count("pk"),
+            completed=Count("pk", filter=Q(status=Enrollment.STATUS_COMPLETED)),
+            canceled=Count("pk", filter=Q(status=Enrollment.STATUS_CANCELED)),
+        )
+        .order_by()
+    )
+
+
+def _comment_rows(queryset):
+    return (
+        queryset.filter(rating__isnull=False)
+        .annotate(day=TruncDate("created_at"))
+        .values("course_id", "day")
+        .annotate(rating_sum=Sum("rating"), rating_count=Count("pk"))
+        .order_by()
+    )
+
+
+def mark_stale_day(course_id, moment):
+    """
+    Anota que el día de `moment` del curso hay que recalcularlo.
+    """
+    StaleCourseDay.objects.create(course_id=course_id, date=timezone.localdate(moment))
+
+
+def _changed_days(queryset, date_field, since):
+    return set(
+        queryset.filter(updated_at__gte=since)
+        .annotate(day=TruncDate(date_field))
+        .values_list("course_id", "day")
+        .distinct()
+    )
+
+
+def _day_range(days):
+    """
+    Límites [inicio, fin) en la zona horaria actual que cubren `days`.
+    """
+    tz = timezone.get_current_timezone()
+    start = datetime.datetime.combine(min(days), datetime.time.min, tzinfo=tz)
+    end = datetime.datetime.combine(max(days) + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+    return start, end
+
+
+def aggregate_days(keys=None):
+    """
+    Calcula CourseDailyStats (sin guardar) para los pares (curso, día) de
+    `keys`, o para todos los que tengan datos si `keys` es None. Los pares
+    que ya no tienen filas quedan a cero.
+    """
+    enrollments, comments = Enrollment.objects.all(), Comment.objects.all()
+    if keys is not None:
+        if not keys:
+            return []
+        courses = {course_id for course_id, _ in keys}
+        start, end = _day_range({day for _, day in keys})
+        enrollments = enrollments.filter(course_id__in=courses, enrolled_at__gte=start, enrolled_at__lt=end)
+        comments = comments.filter(course_id__in=courses, created_at__gte=start, created_at__lt=end)
+
+    stats = {key: CourseDailyStats(course_id=key[0], date=key[1]) for key in keys or ()}
+    for rows in (_enrollment_rows(enrollments), _comment_rows(comments)):
+        for row in rows:
+            key = (row.pop("course_id"), row.pop("day"))
+            if keys is not None and key not in stats:
+                continue
+            item = stats.setdefault(key, CourseDailyStats(course_id=key[0], date=key[1]))
+            for name, value in row.items():
+                setattr(item, name, value)
+    return list(stats.values())
+
+
+def rollup_course_stats(full=False, batch_size=200):
+    """
+    Actualiza CourseDailyStats y avanza la marca. Devuelve cuántos
+    (curso, día) se escribieron.
+    """
+    started = Watermark.objects.visible_position()
+    since = None if full else Watermark.objects.since(WATERMARK)
+    # Se borran por pk las anotaciones leídas aquí; las que se confirmen
+    # mientras tanto quedan para la próxima ejecución.
+    stale = list(StaleCourseDay.objects.values_list("pk", "course_id", "date"))
+    stale_ids = [pk for pk, _, _ in stale]
+
+    if since is None:
+        with transaction.atomic():
+            CourseDailyStats.objects.all().delete()
+            written = len(CourseDailyStats.objects.bulk_create(aggregate_days(), batch_size=1000))
+            StaleCourseDay.objects.filter(pk__in=stale_ids).delete()
+        Watermark.objects.advance(WATERMARK, started)
+        return written
+
+    keys = _changed_days(Enrollment.objects.all(), "enrolled_at", since)
+    keys |= _changed_days(Comment.objects.all(), "created_at", since)
+    keys |= {(course_id, day) for _, course_id, day in stale}
+
+    # Por lotes de cursos, para que el rango de fechas de cada consulta
+    # no abarque los días de todos los cursos.
+    courses = sorted({course_id for course_id, _ in keys})
+    written = 0
+    for start in range(0, len(courses), batch_size):
+        batch = set(courses[start:start + batch_size])
+        stats = aggregate_days({key for key in keys if key[0] in batch})
+        CourseDailyStats.objects.bulk_create(
+            stats, batch_size=1000, update_conflicts=True,
+            unique_fields=["course", "date"], update_fields=list(STAT_FIELDS),
+        )
+        written += len(stats)
+
+    StaleCourseDay.objects.filter(pk__in=stale_ids).delete()
+    Watermark.objects.advance(WATERMARK, started)
+    return written
@@ -0,0 +1,65 @@
+"""
+Configuración de los proveedores de login social (Google) cacheada en la
+memoria del proceso.
+
+Las páginas de login y registro solo necesitan saber si hay un SocialApp
+para el sitio actual y cuál es la URL de inicio del flujo. Eso se calcula
+una vez por (sitio, proveedor) y se descarta cuando cambia un SocialApp o
+un Site (señales). Como las señales solo llegan al proceso que hizo el
+cambio, las entradas caducan además tras AUTH_PROVIDERS_CACHE_TIMEOUT.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import REDIRECT_FIELD_NAME
+from django.contrib.sites.shortcuts import get_current_site
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
+
+GOOGLE = "google"
+
+_entries = {}  # (site_id, proveedor) -> (url o None, caduca_en)
+
+
+def _timeout():
+    return getattr(settings, "AUTH_PROVIDERS_CACHE_TIMEOUT", 300)
+
+
+def _load_login_url(request, provider):
+    from allauth.socialaccount.adapter import get_adapter
+
+    if not get_adapter().list_apps(request, provider=provider):
+        return None
+    return reverse(f"{provider}_login")
+
+
+def provider_base_url(request, provider=GOOGLE):
+    """
+    URL de inicio del login con `provider`, o None si no está configurado
+    para el sitio actual.
+    """
+    key = (get_current_site(request).pk, provider)
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry is None or entry[1] <= now:
+        entry = (_load_login_url(request, provider), now + _timeout())
+        _entries[key] = entry
+    return entry[0]
+
+
+def provider_login_url(request, provider=GOOGLE):
+    """
+    Igual que el tag `{% provider_login_url %}`, conservando `?next=`,
+    pero sin consultas una vez cacheada la configuración.
+    """
+    url = provider_base_url(request, provider)
+    if url is None:
+        return None
+    next_url = request.GET.get(REDIRECT_FIELD_NAME) or request.POST.get(REDIRECT_FIELD_NAME)
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        url = f"{url}?{urlencode({REDIRECT_FIELD_NAME: next_url})}"
+    return url
+
+
+def clear_provider_cache():
+    _entries.clear()
@@ -0,0 +1,170 @@
+"""
+Avatares de perfil: validación temprana de la subida y miniaturas en
+segundo plano.
+
+Al subir solo se valida el tamaño en bytes y las dimensiones que declara
+la cabecera (sin decodificar la imagen). El worker `process_avatars` genera
+después versiones cuadradas de AVATAR_RENDITION_SIZES en WebP y JPEG. El
+nombre de cada archivo sale del hash del original, así que la URL solo
+cambia si cambia la imagen y se puede cachear como inmutable.
+"""
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+RENDITION_DIR = "avatars/renditions"
+RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def max_upload_size():
+    return getattr(settings, "AVATAR_MAX_UPLOAD_SIZE", 5 * 1024 * 1024)
+
+
+def max_dimension():
+    return getattr(settings, "AVATAR_MAX_DIMENSION", 4096)
+
+
+def rendition_sizes():
+    return getattr(settings, "AVATAR_RENDITION_SIZES", (64, 256))
+
+
+def validate_avatar_upload(file):
+    """
+    Rechaza el archivo por tamaño (sin leerlo) o por dimensiones (leyendo
+    solo la cabecera). Los archivos ya guardados se validaron al subirse.
+    """
+    if getattr(file, "_committed", False):
+        return
+
+    limit = max_upload_size()
+    if file.size > limit:
+        raise ValidationError(
+            f"El avatar no puede superar {filesizeformat(limit)}.", code="file_too_large"
+        )
+
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        raise ValidationError("La imagen es demasiado grande.", code="image_too_large")
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError("El archivo no es una imagen válida.", code="invalid_image")
+    finally:
+        file.seek(0)
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(
+            f"Formato no soportado; usa {', '.join(sorted(ALLOWED_FORMATS))}.", code="invalid_format"
+        )
+    if max(width, height) > max_dimension():
+        raise ValidationError(
+            f"La imagen no puede medir más de {max_dimension()} px por lado.", code="image_too_large"
+        )
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def _to_rgb(image):
+    """
+    Aplana la transparencia sobre fondo blanco (JPEG no tiene canal alfa).
+    """
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, size, image_format, options):
+    square = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    square.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def build_renditions(file):
+    """
+    Genera (si no existen ya) las miniaturas de `file` y devuelve
+    {"<lado>": {"webp": ruta, "jpeg": ruta}}.
+    """
+    digest = content_hash(file)
+    sizes = sorted(rendition_sizes())
+    file.seek(0)
+    with Image.open(file) as original:
+        # En JPEG, draft() decodifica directamente a una escala reducida.
+        original.draft("RGB", (sizes[-1], sizes[-1]))
+        image = _to_rgb(ImageOps.exif_transpose(original))
+
+    renditions = {}
+    for size in sizes:
+        for extension, (image_format, options) in RENDITION_FORMATS.items():
+            name = f"{RENDITION_DIR}/{digest}-{size}.{extension}"
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(_encode(image, size, image_format, options)))
+            renditions.setdefault(str(size), {})[extension] = name
+    return renditions
+
+
+def rendition_urls(renditions, request=None):
+    urls = {}
+    for size, files in renditions.items():
+        urls[size] = {}
+        for extension, name in files.items():
+            url = default_storage.url(name)
+            urls[size][extension] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def process_pending_avatars(batch_size=20):
+    """
+    Procesa un lote de perfiles con el avatar pendiente. Las filas se
+    bloquean con SKIP LOCKED, así que se pueden ejecutar varios workers.
+    Devuelve cuántos perfiles se procesaron.
+    """
+    from .models import Profile
+
+    with transaction.atomic():
+        profiles = list(
+            Profile.objects.select_for_update(skip_locked=True)
+            .filter(avatar_status=Profile.AVATAR_PENDING)
+            .order_by("updated_at")[:batch_size]
+        )
+        for profile in profiles:
+            try:
+                with profile.avatar.open("rb") as file:
+                    profile.avatar_renditions = build_renditions(file)
+                profile.avatar_status = Profile.AVATAR_READY
+            except (OSError, ValueError, Image.DecompressionBombError) as exc:
+                logger.warning("No se pudo procesar el avatar del perfil %s: %s", profile.pk, exc)
+                profile.avatar_renditions = {}
+                profile.avatar_status = Profile.AVATAR_FAILED
+            except Exception:
+                # Un error inesperado (almacenamiento, Pillow...) no debe dejar
+                # el lote entero en pendiente ni repetirse en cada ejecución.
+                logger.exception("Error inesperado procesando el avatar del perfil %s", profile.pk)
+                profile.avatar_renditions = {}
+                profile.avatar_status = Profile.AVATAR_FAILED
+        Profile.objects.bulk_update(profiles, ["avatar_status", "avatar_renditions"])
+    return len(profiles)
@@ -0,0 +1,38 @@
+"""
+Utilidades comunes de los comandos `bench_*`.
+"""
+import json
+import math
+import statistics
+
+
+def percentile(values, pct):
+    """
+    Percentil por el método del rango más cercano sobre una lista ya ordenada.
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize(latencies_ms):
+    """
+    Resume una lista de latencias en milisegundos.
+    """
+    values = sorted(latencies_ms)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, ensure_ascii=False, default=str)
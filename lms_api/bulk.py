@@ -0,0 +1,119 @@
+"""
+Utilidades para los endpoints de escritura masiva (`.../bulk/`).
+
+El flujo es: precargar en una consulta por modelo todos los objetos
+relacionados que aparecen en el lote, validar cada elemento con su
+serializer (sin consultas extra) y, si ninguno falla, escribir todo con
+bulk_create/bulk_update dentro de una transacción.
+"""
+from django.conf import settings
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, ValidationError
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que primero busca el objeto en
+    `context["preloaded"][modelo]` (llenado por preload_related).
+    Fuera de un lote se comporta como el campo normal.
+    """
+
+    def __init__(self, *args, preload_only=None, **kwargs):
+        self.preload_only = preload_only
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            obj = preloaded.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class BulkValidationError(APIException):
+    """
+    Error 400 con la lista de errores por índice: {"errors": [{"index", "errors"}]}.
+    (ValidationError convertiría los índices a texto.)
+    """
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = "invalid"
+
+    def __init__(self, errors):
+        self.detail = {"errors": errors}
+
+
+def get_items(data):
+    """
+    Valida la forma del cuerpo: una lista no vacía de objetos, con tope BULK_MAX_ITEMS.
+    """
+    limit = getattr(settings, "BULK_MAX_ITEMS", 1000)
+    if not isinstance(data, list) or not data:
+        raise ValidationError({"non_field_errors": ["Se esperaba una lista no vacía de elementos."]})
+    if len(data) > limit:
+        raise ValidationError({"non_field_errors": [f"Máximo {limit} elementos por petición."]})
+    return data
+
+
+def preload_related(serializer_class, items, context):
+    """
+    Carga con un in_bulk() por modelo los objetos que referencian los
+    elementos del lote y los deja en context["preloaded"].
+    """
+    preloaded = {}
+    for name, field in serializer_class(context=context).fields.items():
+        if field.read_only or not isinstance(field, PreloadedPrimaryKeyRelatedField):
+            continue
+
+        ids = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                pass
+
+        queryset = field.get_queryset()
+        if field.preload_only:
+            queryset = queryset.only(*field.preload_only)
+        preloaded.setdefault(queryset.model, {}).update(queryset.in_bulk(ids))
+
+    context["preloaded"] = preloaded
+    return preloaded
+
+
+def validate_items(serializer_class, items, context, instances=None, partial=False):
+    """
+    Valida cada elemento y devuelve la lista de serializers válidos.
+    Si alguno falla lanza BulkValidationError con los errores por índice.
+    """
+    validated, errors = [], []
+    for index, item in enumerate(items):
+        instance = instances[index] if instances is not None else None
+        if not isinstance(item, dict):
+            errors.append({"index": index, "errors": {"non_field_errors": ["Se esperaba un objeto."]}})
+            continue
+        serializer = serializer_class(instance, data=item, context=context, partial=partial)
+        if serializer.is_valid():
+            validated.append(serializer)
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    if errors:
+        raise BulkValidationError(errors)
+    return validated
+
+
+def item_errors(errors):
+    """
+    Construye la misma respuesta de error que validate_items a partir de
+    {índice: mensaje} detectados fuera de los serializers.
+    """
+    return BulkValidationError([
+        {"index": index, "errors": {"non_field_errors": [message]}}
+        for index, message in sorted(errors.items())
+    ])
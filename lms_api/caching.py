@@ -0,0 +1,198 @@
+"""
+Caché de respuestas del catálogo con versión y ETag.
+
+Las claves incluyen una "versión de catálogo" que cambia cada vez que se
+guarda o borra un Course o un Lesson, así que nunca hace falta borrar
+entradas: las viejas simplemente dejan de usarse y caducan solas. Los
+fragmentos de plantilla de un curso siguen la misma idea con una versión
+por curso, para que editar un curso no invalide los de los demás.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOGUE_VERSION_KEY = "catalogue:version"
+
+
+def catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not cache.add(CATALOGUE_VERSION_KEY, version, None):
+            version = cache.get(CATALOGUE_VERSION_KEY, version)
+    return version
+
+
+async def acatalogue_version():
+    version = await cache.aget(CATALOGUE_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not await cache.aadd(CATALOGUE_VERSION_KEY, version, None):
+            version = await cache.aget(CATALOGUE_VERSION_KEY, version)
+    return version
+
+
+def bump_catalogue_version():
+    cache.set(CATALOGUE_VERSION_KEY, uuid.uuid4().hex[:12], None)
+
+
+def _course_version_key(course_id):
+    return f"course:{course_id}:version"
+
+
+def course_versions(course_ids):
+    """
+    {id: versión} de cada curso. La versión cambia al guardar el curso o
+    una de sus lecciones y forma parte de la clave de sus fragmentos de
+    plantilla cacheados.
+    """
+    keys = {_course_version_key(course_id): course_id for course_id in course_ids}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for key in keys.keys() - found.keys():
+        version = uuid.uuid4().hex[:12]
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+        versions[keys[key]] = version
+    return versions
+
+
+async def acourse_versions(course_ids):
+    keys = {_course_version_key(course_id): course_id for course_id in course_ids}
+    found = await cache.aget_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for key in keys.keys() - found.keys():
+        version = uuid.uuid4().hex[:12]
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key, version)
+        versions[keys[key]] = version
+    return versions
+
+
+def bump_course_versions(course_ids):
+    cache.set_many({_course_version_key(course_id): uuid.uuid4().hex[:12] for course_id in course_ids}, None)
+
+
+def fragment_timeout():
+    return getattr(settings, "TEMPLATE_FRAGMENT_CACHE_TIMEOUT", 3600)
+
+
+def catalogue_key(*parts):
+    return ":".join(["catalogue", catalogue_version(), *map(str, parts)])
+
+
+async def acatalogue_key(*parts):
+    return ":".join(["catalogue", await acatalogue_version(), *map(str, parts)])
+
+
+async def acourse_key(course_id, *parts):
+    """
+    Clave ligada a la versión de un curso: caduca al editar ese curso o sus
+    lecciones, no al tocar cualquier otro del catálogo.
+    """
+    versions = await acourse_versions([course_id])
+    return ":".join(["course", str(course_id), versions[course_id], *map(str, parts)])
+
+
+def request_fingerprint(request):
+    """
+    Host + ruta + parámetros GET ordenados, resumidos en un hash corto.
+    (El host importa porque los enlaces de paginación son absolutos.)
+    """
+    query = sorted(request.GET.lists())
+    raw = json.dumps([request.get_host(), request.path, query]).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+def make_etag(content):
+    return '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
+
+def _timeout():
+    return getattr(settings, "CATALOGUE_CACHE_TIMEOUT", 300)
+
+
+def _json_entry(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder).encode()
+    return body, make_etag(body)
+
+
+def _json_response(request, entry):
+    body, etag = entry
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def cached_json_response(request, key, build):
+    """
+    Devuelve un HttpResponse JSON cacheado bajo `key` (ya codificado), o 304
+    si el cliente envía un If-None-Match que coincide. `build` se llama solo
+    en caso de fallo de caché y debe devolver datos serializables.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        entry = _json_entry(build())
+        cache.set(key, entry, _timeout())
+    return _json_response(request, entry)
+
+
+async def acached_json_response(request, key, build):
+    """
+    Igual que cached_json_response, pero `build` es una corrutina.
+    """
+    entry = await cache.aget(key)
+    if entry is None:
+        entry = _json_entry(await build())
+        await cache.aset(key, entry, _timeout())
+    return _json_response(request, entry)
+
+
+class CatalogueCacheMixin:
+    """
+    Cachea `response.data` de list/retrieve de un ViewSet por versión de
+    catálogo y responde 304 a las peticiones condicionales.
+    """
+
+    def _cached_response(self, request, build):
+        key = catalogue_key(self.basename, self.action, request_fingerprint(request))
+        entry = cache.get(key)
+        if entry is None:
+            data = build().data
+            content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+            entry = (data, make_etag(content))
+            cache.set(key, entry, _timeout())
+
+        data, etag = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        return self._cached_response(request, lambda: build(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        return self._cached_response(request, lambda: build(request, *args, **kwargs))
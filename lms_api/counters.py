@@ -0,0 +1,80 @@
+"""
+Contadores desnormalizados de Course (inscripciones, lecciones y rating).
+
+Cada Enrollment, Lesson y Comment "aporta" una cantidad a los contadores de
+su curso. Al crear, modificar o borrar una fila se aplica solo la diferencia
+con un UPDATE atómico (`F() + n`), sin volver a contar la tabla.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Course, Enrollment, Lesson
+
+
+def enrollment_contribution(status):
+    return {
+        "enrollment_count": 1,
+        "active_count": int(status == Enrollment.STATUS_ACTIVE),
+    }
+
+
+def lesson_contribution():
+    return {"lesson_count": 1}
+
+
+def comment_contribution(rating):
+    if rating is None:
+        return {}
+    return {"rating_sum": rating, "rating_count": 1}
+
+
+def adjust_course_counters(course_id, **deltas):
+    """
+    Suma `deltas` a los contadores del curso con un solo UPDATE.
+    """
+    updates = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    if course_id is None or not updates:
+        return
+    Course.objects.filter(pk=course_id).update(**updates)
+
+
+def move_contribution(old_course_id, old, new_course_id, new):
+    """
+    Reemplaza la contribución `old` (en old_course_id) por `new` (en new_course_id).
+    Usar None/{} como lado "viejo" al crear y como lado "nuevo" al borrar.
+    """
+    if old_course_id == new_course_id:
+        keys = set(old) | set(new)
+        adjust_course_counters(new_course_id, **{k: new.get(k, 0) - old.get(k, 0) for k in keys})
+        return
+    adjust_course_counters(old_course_id, **{k: -v for k, v in old.items()})
+    adjust_course_counters(new_course_id, **new)
+
+
+def _per_course(queryset, aggregate):
+    subquery = (
+        queryset.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=aggregate)
+        .values("total")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+
+def rebuild_course_counters(courses=None):
+    """
+    Recalcula desde cero los contadores de `courses` (todos por defecto).
+    Sirve para reparar desviaciones; devuelve el número de cursos actualizados.
+    """
+    if courses is None:
+        courses = Course.objects.all()
+    return courses.update(
+        enrollment_count=_per_course(Enrollment.objects.all(), Count("pk")),
+        active_count=_per_course(
+            Enrollment.objects.filter(status=Enrollment.STATUS_ACTIVE), Count("pk")
+        ),
+        lesson_count=_per_course(Lesson.objects.all(), Count("pk")),
+        rating_sum=_per_course(Comment.objects.filter(rating__isnull=False), Sum("rating")),
+        rating_count=_per_course(Comment.objects.filter(rating__isnull=False), Count("pk")),
+    )
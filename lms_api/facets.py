@@ -0,0 +1,91 @@
+"""
+Conteos por faceta del catálogo (nivel, idioma, categoría, precio y duración).
+
+Todas las facetas salen de una sola consulta con GROUPING SETS sobre el
+queryset ya filtrado, en lugar de un COUNT por cada valor.
+"""
+from django.db import connections
+from django.db.models import Case, CharField, Q, Value, When
+
+PRICE_BUCKETS = (
+    ("gratis", Q(price=0)),
+    ("0-20", Q(price__gt=0, price__lt=20)),
+    ("20-50", Q(price__gte=20, price__lt=50)),
+    ("50-100", Q(price__gte=50, price__lt=100)),
+    ("100+", Q(price__gte=100)),
+)
+
+DURATION_BUCKETS = (
+    ("0-2h", Q(duration_hours__lt=2)),
+    ("2-5h", Q(duration_hours__gte=2, duration_hours__lt=5)),
+    ("5-10h", Q(duration_hours__gte=5, duration_hours__lt=10)),
+    ("10-20h", Q(duration_hours__gte=10, duration_hours__lt=20)),
+    ("20h+", Q(duration_hours__gte=20)),
+)
+
+# Faceta -> columna del subquery. El orden fija los bits de GROUPING().
+FACETS = ("level", "language", "category", "price", "duration")
+_COLUMNS = ("level", "language", "category", "price_bucket", "duration_bucket")
+_BUCKET_ORDER = {
+    "price": [key for key, _ in PRICE_BUCKETS],
+    "duration": [key for key, _ in DURATION_BUCKETS],
+}
+
+FACETS_SQL = """
+SELECT {columns}, GROUPING({columns}) AS grouping_id, COUNT(*)
+FROM ({subquery}) AS filtered
+GROUP BY GROUPING SETS ({sets}, ())
+"""
+
+
+def _bucket(buckets):
+    return Case(
+        *[When(condition, then=Value(key)) for key, condition in buckets],
+        output_field=CharField(),
+    )
+
+
+def course_facets(queryset):
+    """
+    Devuelve {"total": n, faceta: [{"value", "count"}, ...]} para `queryset`.
+    Los valores de texto van de mayor a menor conteo; los rangos, en su orden.
+    """
+    queryset = (
+        queryset.order_by()
+        .annotate(price_bucket=_bucket(PRICE_BUCKETS), duration_bucket=_bucket(DURATION_BUCKETS))
+        .values(*_COLUMNS)
+    )
+    subquery, params = queryset.query.sql_with_params()
+    sql = FACETS_SQL.format(
+        columns=", ".join(_COLUMNS),
+        subquery=subquery,
+        sets=", ".join(f"({column})" for column in _COLUMNS),
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    # En GROUPING() el primer argumento es el bit más alto; vale 0 si la
+    # columna forma parte del grupo de esa fila.
+    width = len(_COLUMNS)
+    result = {"total": 0, **{facet: [] for facet in FACETS}}
+    for row in rows:
+        grouping_id, count = row[width], row[width + 1]
+        if grouping_id == (1 << width) - 1:
+            result["total"] = count
+            continue
+        index = next(i for i in range(width) if not grouping_id & (1 << (width - 1 - i)))
+        if row[index] is None:
+            # Cursos fuera de todos los rangos (p. ej. un precio negativo antiguo).
+            continue
+        result[FACETS[index]].append({"value": row[index], "count": count})
+
+    for facet, values in result.items():
+        if facet == "total":
+            continue
+        order = _BUCKET_ORDER.get(facet)
+        if order:
+            values.sort(key=lambda item: order.index(item["value"]))
+        else:
+            values.sort(key=lambda item: (-item["count"], item["value"]))
+    return result
@@ -0,0 +1,166 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from lms_api.benchmarking import summarize, write_json
+from lms_api.caching import bump_catalogue_version, bump_course_versions
+from lms_api.models import Course, Lesson
+
+# Vistas que cambian estado aunque se llamen con GET, o que no tiene sentido medir.
+SKIP_NAMES = {"logout", "activate_account", "ajax_enroll_course", "api-root"}
+# URLconf de terceros que no se recorren.
+SKIP_NAMESPACES = {"admin"}
+SKIP_MODULE_PREFIXES = ("allauth.",)
+# Parámetros de ruta que no son la pk del modelo del ViewSet.
+PARAM_MODELS = {"course_id": Course, "lesson_id": Lesson, "user_id": User}
+
+
+def iter_patterns(patterns, prefix=""):
+    """
+    Recorre el árbol de URLs y devuelve (ruta, patrón) de cada vista con
+    nombre, sin entrar en los URLconf de terceros.
+    """
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            module = getattr(pattern.urlconf_module, "__name__", "")
+            if pattern.namespace in SKIP_NAMESPACES or module.startswith(SKIP_MODULE_PREFIXES):
+                continue
+            yield from iter_patterns(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield route, pattern
+
+
+def route_params(pattern):
+    regex = pattern.pattern.regex
+    return list(regex.groupindex)
+
+
+def view_model(pattern):
+    cls = getattr(pattern.callback, "cls", None)
+    queryset = getattr(cls, "queryset", None)
+    return queryset.model if queryset is not None else None
+
+
+def allows_get(pattern):
+    actions = getattr(pattern.callback, "actions", None)
+    return actions is None or "get" in actions
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide todas las URLs GET de project/urls.py y lms_api/urls.py con el cliente de "
+        "pruebas: latencia p50/p95/p99, número de consultas y tamaño de respuesta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--username", help="Usuario con el que iniciar sesión (por defecto el primer superusuario).")
+        parser.add_argument("--only", nargs="*", default=[], help="Medir solo estos nombres de URL.")
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Invalidar el catálogo y las versiones de los cursos antes de cada petición.",
+        )
+        parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["username"])
+        client = Client()
+        client.force_login(user)
+
+        results = {}
+        for route, pattern in iter_patterns(get_resolver().url_patterns):
+            name = pattern.name
+            if name in SKIP_NAMES or not allows_get(pattern) or name in results:
+                continue
+            if options["only"] and name not in options["only"]:
+                continue
+            try:
+                url = self.build_url(pattern)
+            except LookupError as exc:
+                self.stderr.write(f"{name}: omitida ({exc})")
+                continue
+            results[name] = self.measure(client, url, options)
+            results[name]["route"] = route
+
+        self.report(results)
+        if options["output"]:
+            write_json(options["output"], {
+                "timestamp": timezone.now().isoformat(),
+                "user": user.username,
+                "iterations": options["iterations"],
+                "cold": options["cold"],
+                "endpoints": results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def get_user(self, username):
+        users = User.objects.all()
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("No hay usuario para iniciar sesión; usa --username o crea un superusuario.")
+        return user
+
+    def build_url(self, pattern):
+        kwargs = {}
+        for param in route_params(pattern):
+            if param == "format":
+                raise LookupError("sufijo de formato")
+            model = PARAM_MODELS.get(param) or (view_model(pattern) if param == "pk" else None)
+            if model is None:
+                raise LookupError(f"no se sabe qué valor usar para '{param}'")
+            pk = model.objects.order_by("pk").values_list("pk", flat=True).first()
+            if pk is None:
+                raise LookupError(f"no hay filas de {model.__name__}")
+            kwargs[param] = pk
+        return reverse(pattern.name, kwargs=kwargs)
+
+    def measure(self, client, url, options):
+        for _ in range(options["warmup"]):
+            client.get(url)
+
+        # --cold invalida solo las claves del catálogo y de los cursos; un
+        # cache.clear() vaciaría también sesiones y cualquier otra cosa que
+        # compartiera el Redis.
+        course_ids = list(Course.objects.values_list("pk", flat=True)) if options["cold"] else []
+        latencies, queries, sizes, statuses = [], [], [], set()
+        for _ in range(options["iterations"]):
+            if options["cold"]:
+                bump_catalogue_version()
+                bump_course_versions(course_ids)
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(ctx.captured_queries))
+            sizes.append(size)
+            statuses.add(response.status_code)
+
+        summary = summarize(latencies)
+        summary.update({
+            "url": url,
+            "status": sorted(statuses),
+            "queries": max(queries),
+            "bytes": max(sizes),
+        })
+        return summary
+
+    def report(self, results):
+        self.stdout.write(f"{'url':<28} {'status':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'bytes':>9}")
+        for name, data in results.items():
+            status = ",".join(map(str, data["status"]))
+            self.stdout.write(
+                f"{name:<28} {status:>8} {data['p50_ms']:>9} {data['p95_ms']:>9} "
+                f"{data['p99_ms']:>9} {data['queries']:>8} {data['bytes']:>9}"
+            )
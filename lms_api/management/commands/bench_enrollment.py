@@ -0,0 +1,154 @@
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from lms_api.benchmarking import summarize, write_json
+from lms_api.models import Course, Enrollment
+
+ENROLLMENT_TABLE = Enrollment._meta.db_table
+# Copia de la tabla sin la restricción unique_enrollment (ni PK ni FK), como
+# estaba antes de la migración 0008: solo ahí get_or_create puede duplicar.
+LEGACY_TABLE = "bench_legacy_enrollment"
+
+
+def legacy_enroll_unconstrained(user, course_id):
+    """
+    Camino anterior sobre la tabla sin restricción: leer el curso y luego
+    las mismas dos consultas que get_or_create (SELECT y, si no hay, INSERT).
+    """
+    course = Course.objects.get(id=course_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id FROM {LEGACY_TABLE} WHERE user_id = %s AND course_id = %s", [user.pk, course.pk]
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f"INSERT INTO {LEGACY_TABLE} "
+                "(user_id, course_id, status, progress, completed_lessons, enrolled_at, updated_at) "
+                "VALUES (%s, %s, 'active', 0, 0, now(), now())",
+                [user.pk, course.pk],
+            )
+
+
+def legacy_enroll(user, course_id):
+    """
+    Camino anterior con la restricción actual: no duplica, pero los hilos que
+    pierden la carrera pagan el IntegrityError y el SELECT de reintento.
+    """
+    course = Course.objects.get(id=course_id)
+    Enrollment.objects.get_or_create(user=user, course=course, defaults={"status": "active"})
+
+
+def atomic_enroll(user, course_id):
+    Enrollment.objects.enroll(user, course_id)
+
+
+# Nombre -> (función, tabla donde quedan las inscripciones).
+STRATEGIES = {
+    "get_or_create sin restricción": (legacy_enroll_unconstrained, LEGACY_TABLE),
+    "get_or_create": (legacy_enroll, ENROLLMENT_TABLE),
+    "enroll": (atomic_enroll, ENROLLMENT_TABLE),
+}
+
+
+def count_enrollments(table, course_id):
+    """
+    (inscripciones, usuarios con más de una) del curso en `table`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT coalesce(sum(n), 0), count(*) FILTER (WHERE n > 1) FROM "
+            f"(SELECT count(*) AS n FROM {table} WHERE course_id = %s GROUP BY user_id) AS per_user",
+            [course_id],
+        )
+        return cursor.fetchone()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de contención: varios hilos inscriben a la vez al mismo usuario "
+        "en el mismo curso. Compara get_or_create (sobre una copia de la tabla sin la "
+        "restricción única, para ver los duplicados, y sobre la tabla real) con "
+        "Enrollment.objects.enroll."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Peticiones simultáneas por par.")
+        parser.add_argument("--users", type=int, default=50, help="Pares (usuario, curso) a probar.")
+        parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, threads, users, output=None, **options):
+        tag = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f"bench_owner_{tag}")
+        course = Course.objects.create(owner=owner, title=f"Bench {tag}", description="bench", level="bench")
+        students = User.objects.bulk_create(
+            [User(username=f"bench_{tag}_{i}") for i in range(users)]
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {LEGACY_TABLE} (LIKE {ENROLLMENT_TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY)"
+            )
+
+        results = {}
+        try:
+            for name, (strategy, table) in STRATEGIES.items():
+                Enrollment.objects.filter(course=course).delete()
+                results[name] = self.run_strategy(strategy, students, course.pk, threads)
+                results[name]["enrollments"], results[name]["duplicates"] = count_enrollments(table, course.pk)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {LEGACY_TABLE}")
+            course.delete()
+            User.objects.filter(pk__in=[u.pk for u in students] + [owner.pk]).delete()
+
+        for name, data in results.items():
+            self.stdout.write(
+                f"{name:>30}: p50={data['p50_ms']}ms p95={data['p95_ms']}ms p99={data['p99_ms']}ms "
+                f"queries/llamada={data['queries_per_call']} errores={data['errors']} "
+                f"inscripciones={data['enrollments']} duplicados={data['duplicates']}"
+            )
+        if output:
+            write_json(output, {"threads": threads, "users": users, "results": results})
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {output}"))
+
+    def run_strategy(self, strategy, students, course_id, threads):
+        latencies, queries, errors = [], [], []
+        lock = threading.Lock()
+
+        def worker(user, barrier):
+            try:
+                barrier.wait()
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            strategy(user, course_id)
+                    except Exception as exc:
+                        with lock:
+                            errors.append(type(exc).__name__)
+                    elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    queries.append(len(ctx.captured_queries))
+            finally:
+                connection.close()
+
+        for user in students:
+            barrier = threading.Barrier(threads)
+            pool = [threading.Thread(target=worker, args=(user, barrier)) for _ in range(threads)]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+
+        summary = summarize(latencies)
+        # CaptureQueriesContext cuenta también SAVEPOINT/RELEASE de atomic().
+        summary["queries_per_call"] = round(sum(queries) / len(queries), 2) if queries else 0
+        summary["errors"] = len(errors)
+        return summary
@@ -0,0 +1,75 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from lms_api.benchmarking import summarize, write_json
+
+ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+}
+
+
+def session_queries(captured):
+    return sum(1 for query in captured if "django_session" in query["sql"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el coste de sesión por petición con el backend `db` y con "
+        "`cached_db` (la caché configurada en CACHES)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/home/", help="URL autenticada a pedir.")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--username", help="Usuario con el que iniciar sesión (por defecto el primer superusuario).")
+        parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, url, iterations, username=None, output=None, **options):
+        users = User.objects.all()
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("No hay usuario para iniciar sesión; usa --username o crea un superusuario.")
+
+        results = {}
+        for name, engine in ENGINES.items():
+            with override_settings(SESSION_ENGINE=engine):
+                results[name] = self.run_engine(user, url, iterations)
+
+        for name, data in results.items():
+            self.stdout.write(
+                f"{name:>10}: p50={data['p50_ms']}ms p95={data['p95_ms']}ms "
+                f"consultas/petición={data['queries_per_request']} "
+                f"de sesión={data['session_queries_per_request']}"
+            )
+        if output:
+            write_json(output, {"url": url, "iterations": iterations, "results": results})
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {output}"))
+
+    def run_engine(self, user, url, iterations):
+        # Cliente nuevo: SessionMiddleware lee SESSION_ENGINE al cargarse.
+        client = Client()
+        client.force_login(user)
+        client.get(url)
+
+        latencies, queries, from_session = [], 0, 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f"{url} respondió {response.status_code}.")
+            queries += len(ctx.captured_queries)
+            from_session += session_queries(ctx.captured_queries)
+
+        client.logout()
+        summary = summarize(latencies)
+        summary["queries_per_request"] = round(queries / iterations, 2)
+        summary["session_queries_per_request"] = round(from_session / iterations, 2)
+        return summary
@@ -0,0 +1,128 @@
+import copy
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.template.backends import django as django_backend
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from lms_api.benchmarking import summarize, write_json
+from lms_api.models import Enrollment
+
+PLAIN_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def plain_loader_templates():
+    """
+    TEMPLATES con los mismos cargadores pero sin cached.Loader.
+    """
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for engine in templates:
+        engine["APP_DIRS"] = False
+        engine.setdefault("OPTIONS", {})["loaders"] = PLAIN_LOADERS
+    return templates
+
+
+@contextmanager
+def timed_renders():
+    """
+    Anota la duración (ms) de cada render de plantilla mientras está activo.
+    """
+    durations = []
+    original = django_backend.Template.render
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            durations.append((time.perf_counter() - start) * 1000)
+
+    django_backend.Template.render = render
+    try:
+        yield durations
+    finally:
+        django_backend.Template.render = original
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el render de courses/detail.html y courses/my_courses.html con y sin caché de "
+        "fragmentos y con y sin el cargador de plantillas cacheado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument(
+            "--username",
+            help="Usuario para las páginas (por defecto el que tenga más inscripciones).",
+        )
+        parser.add_argument("--course", type=int, help="Curso del detalle (por defecto uno del usuario).")
+        parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, iterations, username=None, course=None, output=None, **options):
+        users = User.objects.annotate(n=Count("enrollments")).filter(n__gt=0)
+        user = users.filter(username=username).first() if username else users.order_by("-n").first()
+        if user is None:
+            raise CommandError("No hay usuario con inscripciones; usa --username o ejecuta seed_lms.")
+        course_id = course or Enrollment.objects.filter(user=user).values_list("course_id", flat=True).first()
+
+        pages = {
+            "detail": reverse("course_detail", args=[course_id]),
+            "my_courses": reverse("my_courses"),
+        }
+        variants = {
+            "sin fragmentos, sin cached.Loader": {"TEMPLATE_FRAGMENT_CACHE_TIMEOUT": 0, "TEMPLATES": plain_loader_templates()},
+            "sin fragmentos": {"TEMPLATE_FRAGMENT_CACHE_TIMEOUT": 0},
+            "fragmentos, sin cached.Loader": {"TEMPLATES": plain_loader_templates()},
+            "fragmentos + cached.Loader": {},
+        }
+
+        results = {}
+        for page, url in pages.items():
+            for name, overrides in variants.items():
+                with override_settings(**overrides):
+                    results.setdefault(page, {})[name] = self.run_variant(user, url, iterations)
+
+        for page, by_variant in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{page} ({pages[page]})"))
+            for name, data in by_variant.items():
+                self.stdout.write(
+                    f"  {name:<36} render p50={data['render']['p50_ms']}ms p95={data['render']['p95_ms']}ms "
+                    f"petición p50={data['request']['p50_ms']}ms consultas={data['queries_per_request']}"
+                )
+        if output:
+            write_json(output, {"user": user.username, "pages": pages, "iterations": iterations, "results": results})
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {output}"))
+
+    def run_variant(self, user, url, iterations):
+        client = Client()
+        client.force_login(user)
+        # Calentamiento: compila plantillas y llena los fragmentos.
+        client.get(url)
+
+        latencies, queries = [], 0
+        with timed_renders() as renders:
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} respondió {response.status_code}.")
+                queries += len(ctx.captured_queries)
+
+        return {
+            "render": summarize(renders),
+            "request": summarize(latencies),
+            "queries_per_request": round(queries / iterations, 2),
+        }
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms_api.recommendations import compute_recommendations, min_shared, top_k
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula los cursos relacionados por co-ocurrencia de inscripciones. Por defecto "
+        "solo recalcula los afectados por inscripciones nuevas o modificadas desde la última ejecución."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Recalcula todos los cursos (recoge también las inscripciones borradas).",
+        )
+        parser.add_argument("--top-k", type=int, dest="k", help=f"Vecinos por curso (por defecto {top_k()}).")
+        parser.add_argument(
+            "--min-shared", type=int, dest="minimum",
+            help=f"Estudiantes en común mínimos para recomendar (por defecto {min_shared()}).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Cursos por transacción.")
+
+    def handle(self, *args, full, k=None, minimum=None, batch_size=500, **options):
+        start = time.perf_counter()
+        courses, rows = compute_recommendations(full=full, k=k, minimum=minimum, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomendaciones de {courses} cursos recalculadas ({rows} filas) en {elapsed:.2f}s."
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms_api.avatars import process_pending_avatars
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas WebP/JPEG de los avatares pendientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument(
+            "--interval", type=float, default=5.0,
+            help="Segundos de espera cuando no hay avatares pendientes.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Procesa los pendientes una vez y termina (útil para cron).",
+        )
+
+    def handle(self, *args, batch_size, interval, once, **options):
+        total = 0
+        try:
+            while True:
+                processed = process_pending_avatars(batch_size=batch_size)
+                total += processed
+                if processed:
+                    continue
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{total} avatares procesados."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lms_api.counters import rebuild_course_counters
+from lms_api.models import Course
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores desnormalizados de los cursos (inscripciones, lecciones, rating)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course", type=int, action="append", dest="course_ids",
+            help="Id de curso a reparar (se puede repetir). Por defecto, todos.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Cursos por transacción para no bloquear la tabla completa.",
+        )
+
+    def handle(self, *args, course_ids=None, batch_size=500, **options):
+        courses = Course.objects.order_by("pk")
+        if course_ids:
+            courses = courses.filter(pk__in=course_ids)
+
+        ids = list(courses.values_list("pk", flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            with transaction.atomic():
+                updated += rebuild_course_counters(
+                    Course.objects.filter(pk__in=ids[start:start + batch_size])
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados para {updated} cursos."))
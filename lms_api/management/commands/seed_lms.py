@@ -0,0 +1,181 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from lms_api.caching import bump_catalogue_version
+from lms_api.counters import rebuild_course_counters
+from lms_api.models import Comment, Course, Enrollment, Lesson, Profile
+from lms_api.search import course_search_vector, reindex_lessons, search_config
+
+PREFIX = "seed_"
+LEVELS = ["Principiante", "Intermedio", "Avanzado"]
+LANGUAGES = ["es", "es", "es", "en", "pt"]
+CATEGORIES = ["Tecnología", "Negocios", "Diseño", "Idiomas", "Ciencia", "Marketing"]
+WORDS = (
+    "python django datos web diseño ventas análisis programación cocina música "
+    "finanzas marketing inglés portugués fotografía redes seguridad nube móvil "
+    "estadística liderazgo productividad escritura dibujo guitarra"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un conjunto de datos sintético y reproducible (usuarios, perfiles, cursos, "
+        "lecciones, inscripciones y comentarios) con inserciones masivas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--lessons", type=int, default=12, help="Lecciones por curso.")
+        parser.add_argument("--enrollments", type=int, default=5, help="Inscripciones por usuario.")
+        parser.add_argument("--comments", type=int, default=10, help="Comentarios por curso.")
+        parser.add_argument("--days", type=int, default=180, help="Antigüedad máxima de las fechas generadas.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--flush", action="store_true",
+            help=f"Borra antes los datos generados previamente (usuarios '{PREFIX}*').",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1:
+            raise CommandError("--users debe ser al menos 1: los instructores de los cursos salen de ahí.")
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+
+        if options["flush"]:
+            deleted, _ = User.objects.filter(username__startswith=PREFIX).delete()
+            self.stdout.write(f"Eliminados {deleted} objetos de ejecuciones anteriores.")
+
+        with transaction.atomic():
+            users = self.create_users(options["users"], batch_size)
+            instructors = users[: max(1, len(users) // 10)]
+            courses = self.create_courses(rng, instructors, options["courses"], batch_size)
+            lessons = self.create_lessons(rng, courses, options["lessons"], batch_size)
+            enrollments = self.create_enrollments(rng, users, courses, options["enrollments"], batch_size)
+            comments = self.create_comments(rng, users, courses, options["comments"], batch_size)
+
+            self.spread_dates(options["days"], courses, enrollments, comments)
+            self.finish(courses, lessons)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Creados {len(users)} usuarios, {len(courses)} cursos, {len(lessons)} lecciones, "
+            f"{len(enrollments)} inscripciones y {len(comments)} comentarios."
+        ))
+
+    def create_users(self, count, batch_size):
+        # Hashear una sola vez: todos los usuarios comparten contraseña ("seed-password").
+        password = make_password("seed-password")
+        start = User.objects.filter(username__startswith=PREFIX).count()
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{PREFIX}{start + i}",
+                    email=f"{PREFIX}{start + i}@example.com",
+                    password=password,
+                )
+                for i in range(count)
+            ],
+            batch_size=batch_size,
+        )
+        Profile.objects.bulk_create(
+            [Profile(user=user, name=user.username, role="student") for user in users],
+            batch_size=batch_size,
+        )
+        return users
+
+    def create_courses(self, rng, instructors, count, batch_size):
+        courses = []
+        for _ in range(count):
+            words = rng.sample(WORDS, 4)
+            courses.append(Course(
+                owner=rng.choice(instructors),
+                title=f"Curso de {words[0]} y {words[1]}",
+                subtitle=f"Aprende {words[2]} desde cero",
+                description=" ".join(rng.choices(WORDS, k=60)),
+                level=rng.choice(LEVELS),
+                language=rng.choice(LANGUAGES),
+                category=rng.choice(CATEGORIES),
+                what_you_will_learn="\n".join(" ".join(rng.choices(WORDS, k=5)) for _ in range(4)),
+                requirements="\n".join(" ".join(rng.choices(WORDS, k=4)) for _ in range(2)),
+                target_audience="\n".join(" ".join(rng.choices(WORDS, k=4)) for _ in range(2)),
+                price=rng.choice([0, 9.99, 19.99, 49.99, 99.99, 199.99]),
+                duration_hours=rng.choice([1, 2.5, 5, 10, 20, 40]),
+            ))
+        return Course.objects.bulk_create(courses, batch_size=batch_size)
+
+    def create_lessons(self, rng, courses, per_course, batch_size):
+        lessons = [
+            Lesson(
+                course=course,
+                title=f"Lección {i + 1}: {rng.choice(WORDS)}",
+                content=" ".join(rng.choices(WORDS, k=400)),
+                video_url=f"https://videos.example.com/{course.pk}/{i + 1}",
+            )
+            for course in courses
+            for i in range(per_course)
+        ]
+        return Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+
+    def create_enrollments(self, rng, users, courses, per_user, batch_size):
+        statuses = [Enrollment.STATUS_ACTIVE] * 6 + [Enrollment.STATUS_COMPLETED] * 3 + [Enrollment.STATUS_CANCELED]
+        enrollments = []
+        for user in users:
+            for course in rng.sample(courses, min(per_user, len(courses))):
+                status = rng.choice(statuses)
+                progress = 100 if status == Enrollment.STATUS_COMPLETED else rng.randint(0, 90)
+                enrollments.append(Enrollment(user=user, course=course, status=status, progress=progress))
+        return Enrollment.objects.bulk_create(enrollments, batch_size=batch_size)
+
+    def create_comments(self, rng, users, courses, per_course, batch_size):
+        comments = [
+            Comment(
+                course=course,
+                user=rng.choice(users),
+                body=" ".join(rng.choices(WORDS, k=25)),
+                rating=rng.choice([None, 1, 2, 3, 3, 4, 4, 4, 5, 5]),
+            )
+            for course in courses
+            for _ in range(per_course)
+        ]
+        return Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+    def spread_dates(self, days, courses, enrollments, comments):
+        """
+        bulk_create pone "ahora" en los auto_now_add; se reparten las fechas
+        de forma determinista (según el id) en los últimos `days` días. Solo
+        se tocan las filas creadas en esta ejecución.
+        """
+        if days <= 0:
+            return
+        seconds = days * 24 * 60 * 60
+        statements = [
+            (Course, "created_at", courses),
+            (Enrollment, "enrolled_at", enrollments),
+            (Comment, "created_at", comments),
+        ]
+        with connection.cursor() as cursor:
+            for model, column, objects in statements:
+                cursor.execute(
+                    f"UPDATE {model._meta.db_table} "
+                    f"SET {column} = {column} - make_interval(secs => (id * 7919) %% %s) "
+                    f"WHERE id = ANY(%s)",
+                    [seconds, [obj.pk for obj in objects]],
+                )
+
+    def finish(self, courses, lessons):
+        """
+        Lo que normalmente hacen las señales: contadores, índice de búsqueda y caché.
+        """
+        course_ids = [course.pk for course in courses]
+        rebuild_course_counters(Course.objects.filter(pk__in=course_ids))
+        for language in {course.language for course in courses}:
+            Course.objects.filter(pk__in=course_ids, language=language).update(
+                search_vector=course_search_vector(search_config(language))
+            )
+        reindex_lessons([lesson.pk for lesson in lessons])
+        transaction.on_commit(bump_catalogue_version)
@@ -0,0 +1,43 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from lms_api.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Entrega los correos pendientes del outbox por lotes, reutilizando la conexión SMTP."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--interval", type=float, default=5.0,
+            help="Segundos de espera cuando no hay correos pendientes.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Vacía la cola una vez y termina (útil para cron).",
+        )
+
+    def handle(self, *args, batch_size, max_attempts, interval, once, **options):
+        connection = get_connection(fail_silently=False)
+        total = 0
+        try:
+            while True:
+                processed = deliver_batch(connection, batch_size=batch_size, max_attempts=max_attempts)
+                total += processed
+                if processed:
+                    continue
+                # Sin trabajo: se cierra la conexión para que el servidor no la corte por inactividad.
+                connection.close()
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f"{total} correos procesados."))
@@ -0,0 +1,262 @@
+"""
+Métricas por vista (nombre de URL resuelto) sin APM externo.
+
+MetricsMiddleware mide cada petición: duración (histograma), consultas y
+tiempo de base de datos, tiempo de render de plantillas y tamaño de la
+respuesta. Cada hilo acumula en su propio diccionario, así que registrar
+no necesita locks; los shards se suman solo al leer `/metrics`.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "<unmatched>"
+
+
+class RequestStats:
+    """
+    Lo que se va sumando durante una petición (vive en un ContextVar).
+    """
+    __slots__ = ("queries", "db_time", "template_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+class ViewStats:
+    __slots__ = ("count", "buckets", "duration", "queries", "db_time", "template_time", "response_bytes", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def record(self, duration, stats, size, status):
+        self.count += 1
+        self.buckets[bisect.bisect_left(BUCKETS, duration)] += 1
+        self.duration += duration
+        self.queries += stats.queries
+        self.db_time += stats.db_time
+        self.template_time += stats.template_time
+        self.response_bytes += size
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.duration += other.duration
+        self.queries += other.queries
+        self.db_time += other.db_time
+        self.template_time += other.template_time
+        self.response_bytes += other.response_bytes
+        for status, count in dict(other.statuses).items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+
+_current = ContextVar("lms_request_stats", default=None)
+_local = threading.local()
+_shards = []  # [(hilo, {vista: ViewStats})]
+_shards_lock = threading.Lock()
+_retired = {}  # shards de hilos que ya terminaron
+_installed = False
+
+
+def _thread_shard():
+    shard = getattr(_local, "views", None)
+    if shard is None:
+        shard = _local.views = {}
+        with _shards_lock:
+            _shards.append((threading.current_thread(), shard))
+    return shard
+
+
+def record(view, duration, stats, size, status):
+    shard = _thread_shard()
+    view_stats = shard.get(view)
+    if view_stats is None:
+        view_stats = shard[view] = ViewStats()
+    view_stats.record(duration, stats, size, status)
+
+
+def snapshot():
+    """
+    Suma todos los shards. Los de hilos muertos se pliegan en `_retired`
+    para que la lista no crezca con servidores que crean un hilo por conexión.
+    """
+    merged = {}
+    with _shards_lock:
+        alive = []
+        for thread, shard in _shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+                target = merged
+            else:
+                target = _retired
+            for view, view_stats in dict(shard).items():
+                target.setdefault(view, ViewStats()).merge(view_stats)
+        _shards[:] = alive
+        for view, view_stats in _retired.items():
+            merged.setdefault(view, ViewStats()).merge(view_stats)
+    return merged
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def _install_query_wrapper(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+_original_render = django_backend.Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    stats = _current.get()
+    if stats is None:
+        return _original_render(self, context, request)
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        stats.template_time += time.perf_counter() - start
+
+
+def install():
+    """
+    Engancha el contador de consultas a cada conexión nueva y envuelve el
+    render de plantillas. Idempotente.
+    """
+    global _installed
+    if _installed:
+        return
+    connection_created.connect(_install_query_wrapper, dispatch_uid="lms_metrics_query_wrapper")
+    for connection in connections.all(initialized_only=True):
+        _install_query_wrapper(None, connection)
+    django_backend.Template.render = _timed_render
+    _installed = True
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None and match.view_name else UNMATCHED
+
+
+def response_size(response):
+    if response.streaming:
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Debe ir primero en MIDDLEWARE para medir también al resto de middlewares.
+    Funciona en modo síncrono y asíncrono, así que bajo ASGI no obliga a
+    Django a pasar la cadena de middlewares a un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    def finish(self, request, response, stats, start):
+        record(view_label(request), time.perf_counter() - start, stats, response_size(response), response.status_code)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_metrics():
+    """
+    Exporta el agregado en el formato de texto de Prometheus.
+    """
+    views = sorted(snapshot().items())
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    family("lms_http_requests_total", "counter", "Peticiones por vista y código de estado.")
+    for view, data in views:
+        for status, count in sorted(data.statuses.items()):
+            lines.append(f'lms_http_requests_total{{view="{_escape(view)}",status="{status}"}} {count}')
+
+    family("lms_http_request_duration_seconds", "histogram", "Duración de la petición por vista.")
+    for view, data in views:
+        label = _escape(view)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, data.buckets):
+            cumulative += count
+            lines.append(f'lms_http_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'lms_http_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {data.count}')
+        lines.append(f'lms_http_request_duration_seconds_sum{{view="{label}"}} {data.duration:.6f}')
+        lines.append(f'lms_http_request_duration_seconds_count{{view="{label}"}} {data.count}')
+
+    counters = [
+        ("lms_db_queries_total", "Consultas SQL ejecutadas por vista.", "queries", "{}"),
+        ("lms_db_query_seconds_total", "Tiempo en base de datos por vista.", "db_time", "{:.6f}"),
+        ("lms_template_render_seconds_total", "Tiempo de render de plantillas por vista.", "template_time", "{:.6f}"),
+        ("lms_http_response_bytes_total", "Bytes de respuesta por vista.", "response_bytes", "{}"),
+    ]
+    for name, help_text, attr, fmt in counters:
+        family(name, "counter", help_text)
+        for view, data in views:
+            lines.append(f'{name}{{view="{_escape(view)}"}} ' + fmt.format(getattr(data, attr)))
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.conf import settings
+from django.db import migrations
+
+# Copia congelada de lms_api.search tal como estaba al crear esta migración:
+# los cambios posteriores en ese módulo no deben alterar el backfill.
+SEARCH_CONFIGS = {
+    "es": "spanish",
+    "español": "spanish",
+    "spanish": "spanish",
+    "en": "english",
+    "inglés": "english",
+    "english": "english",
+    "pt": "portuguese",
+    "portugués": "portuguese",
+    "fr": "french",
+    "francés": "french",
+    "it": "italian",
+    "de": "german",
+}
+
+
+def search_config(language):
+    return SEARCH_CONFIGS.get((language or "").strip().lower(), "simple")
+
+
+def course_search_vector(config):
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("subtitle", weight="B", config=config)
+        + SearchVector("description", weight="C", config=config)
+        + SearchVector("what_you_will_learn", weight="D", config=config)
+    )
+
+
+def lesson_search_vector(config):
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("content", weight="C", config=config)
+    )
+
+
+def backfill_search_vectors(apps, schema_editor):
+    Course = apps.get_model("lms_api", "Course")
+    Lesson = apps.get_model("lms_api", "Lesson")
+
+    languages = Course.objects.values_list("language", flat=True).distinct()
+    for language in languages:
+        config = search_config(language)
+        Course.objects.filter(language=language).update(search_vector=course_search_vector(config))
+        Lesson.objects.filter(course__language=language).update(search_vector=lesson_search_vector(config))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_api', '0003_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='lesson_search_idx'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
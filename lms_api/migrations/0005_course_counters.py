@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+BACKFILL_COUNTERS = """
+UPDATE lms_api_course AS c SET
+    enrollment_count = (SELECT COUNT(*) FROM lms_api_enrollment e WHERE e.course_id = c.id),
+    active_count = (SELECT COUNT(*) FROM lms_api_enrollment e WHERE e.course_id = c.id AND e.status = 'active'),
+    lesson_count = (SELECT COUNT(*) FROM lms_api_lesson l WHERE l.course_id = c.id),
+    rating_sum = (SELECT COALESCE(SUM(m.rating), 0) FROM lms_api_comment m WHERE m.course_id = c.id),
+    rating_count = (SELECT COUNT(m.rating) FROM lms_api_comment m WHERE m.course_id = c.id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_api', '0004_course_lesson_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='active_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_COUNTERS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Antes de crear la restricción se conservan solo la inscripción más antigua
+# de cada (usuario, curso) y se recuentan los contadores afectados.
+REMOVE_DUPLICATES = """
+DELETE FROM lms_api_enrollment e
+USING lms_api_enrollment d
+WHERE e.user_id = d.user_id AND e.course_id = d.course_id AND e.id > d.id;
+
+UPDATE lms_api_course AS c SET
+    enrollment_count = (SELECT COUNT(*) FROM lms_api_enrollment e WHERE e.course_id = c.id),
+    active_count = (SELECT COUNT(*) FROM lms_api_enrollment e WHERE e.course_id = c.id AND e.status = 'active');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_api', '0007_lesson_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(REMOVE_DUPLICATES, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='unique_enrollment'),
+        ),
+    ]
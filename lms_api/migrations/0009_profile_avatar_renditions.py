@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:01
+
+import lms_api.avatars
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_api', '0008_unique_enrollment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_status',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/', validators=[lms_api.avatars.validate_avatar_upload]),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(condition=models.Q(('avatar_status', 'pending')), fields=['updated_at'], name='profile_avatar_pending_idx'),
+        ),
+    ]
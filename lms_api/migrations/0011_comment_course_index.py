@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_api', '0010_course_recommendations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['course', '-created_at', '-id'], include=('rating',), name='comment_course_created_idx'),
+        ),
+    ]
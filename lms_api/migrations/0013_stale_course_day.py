@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_api', '0012_course_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleCourseDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='lms_api.course')),
+            ],
+        ),
+    ]
@@ -1,20 +1,107 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import connections, models, router
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+from .avatars import validate_avatar_upload
+
+
+class TrackedFieldsMixin:
+    """
+    Guarda los valores de `tracked_fields` tal como se cargaron de la base
+    de datos, para que las señales puedan saber qué cambió al guardar.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked_fields()
+        return instance
+
+    def _remember_tracked_fields(self):
+        loaded = self.get_deferred_fields()
+        self._loaded_values = {
+            name: getattr(self, name)
+            for name in self.tracked_fields
+            if name not in loaded
+        }
+
+    def loaded_value(self, name, default=None):
+        return getattr(self, "_loaded_values", {}).get(name, default)
+
+    def has_changed(self, name):
+        """
+        True si el campo cambió desde que se cargó (o si no se conoce su valor original).
+        """
+        loaded = getattr(self, "_loaded_values", {})
+        if name not in loaded:
+            return True
+        return loaded[name] != getattr(self, name)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_tracked_fields()
 
 
 class Profile(models.Model):
+    AVATAR_NONE = ""
+    AVATAR_PENDING = "pending"
+    AVATAR_READY = "ready"
+    AVATAR_FAILED = "failed"
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     name = models.CharField(max_length=150)
     role = models.CharField(max_length=20) 
     bio = models.TextField(max_length=200, blank=True)
-    avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar = models.ImageField(
+        upload_to='avatars/', null=True, blank=True, validators=[validate_avatar_upload]
+    )
+    # Miniaturas generadas por `process_avatars`: {"<lado>": {"webp": ruta, "jpeg": ruta}}
+    avatar_status = models.CharField(max_length=10, blank=True, default=AVATAR_NONE, editable=False)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="profile_avatar_pending_idx",
+                condition=models.Q(avatar_status="pending"),
+            ),
+        ]
+
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Nombre del archivo tal como está en la base de datos.
+        instance._loaded_avatar = instance.__dict__.get("avatar")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Si cambió el avatar, descarta las miniaturas y lo deja pendiente
+        para el worker.
+        """
+        name = self.avatar.name or None
+        loaded = getattr(self, "_loaded_avatar", None) or None
+        if name != loaded or (self.avatar and not self.avatar._committed):
+            self.avatar_status = self.AVATAR_PENDING if name else self.AVATAR_NONE
+            self.avatar_renditions = {}
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "avatar_status", "avatar_renditions"}
+        super().save(*args, **kwargs)
+        self._loaded_avatar = self.avatar.name or None
     
-class Course(models.Model):
+class Course(TrackedFieldsMixin, models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="courses")
     title = models.CharField(max_length=255)
     subtitle = models.CharField(max_length=255, blank=True, null=True) 
@@ -28,23 +115,136 @@ class Course(models.Model):
     price = models.DecimalField(max_digits=7, decimal_places=2, default=0)
     duration_hours = models.DecimalField(max_digits=5, decimal_places=1, default=1.0)
     created_at = models.DateTimeField(auto_now_add=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Contadores desnormalizados, mantenidos por lms_api.counters
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    active_count = models.PositiveIntegerField(default=0, editable=False)
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+
+    tracked_fields = ("language",)
+
+    # Columnas que solo se modifican con UPDATE atómicos; save() nunca las
+    # reescribe para no pisar incrementos concurrentes con valores viejos.
+    managed_fields = (
+        "search_vector", "enrollment_count", "active_count", "lesson_count", "rating_sum", "rating_count",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="course_created_idx"),
+            GinIndex(fields=["search_vector"], name="course_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.managed_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rating_average(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
     
-class Lesson(models.Model):
+class Lesson(TrackedFieldsMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="lessons")
     title = models.CharField(max_length=200)
     content = models.TextField()
     video_url = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    tracked_fields = ("course_id",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="lesson_created_idx"),
+            GinIndex(fields=["search_vector"], name="lesson_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
 
-class Enrollment(models.Model):
+class EnrollmentManager(models.Manager):
+
+    # Inserta la inscripción (si el curso existe y no hay otra igual) y suma
+    # los contadores del curso en una sola sentencia. Las sentencias de
+    # modificación dentro de WITH se ejecutan siempre, se lean o no.
+    ENROLL_SQL = """
+        WITH new AS (
+            INSERT INTO {enrollment} (user_id, course_id, status, progress, completed_lessons, enrolled_at, updated_at)
+            SELECT %(user_id)s, c.id, %(status)s, 0, 0, now(), now()
+            FROM {course} c
+            WHERE c.id = %(course_id)s
+            ON CONFLICT (user_id, course_id) DO NOTHING
+            RETURNING id, course_id, enrolled_at, updated_at
+        ), counted AS (
+            UPDATE {course}
+            SET enrollment_count = enrollment_count + 1,
+                active_count = active_count + %(active)s
+            FROM new
+            WHERE {course}.id = new.course_id
+            RETURNING {course}.id, {course}.title
+        )
+        SELECT new.id, new.enrolled_at, new.updated_at, counted.title
+        FROM new JOIN counted ON counted.id = new.course_id
+    """
+
+    def enroll(self, user, course_id, status="active"):
+        """
+        Inscribe a `user` en el curso sin condiciones de carrera.
+        Devuelve (enrollment, título del curso); enrollment es None si ya
+        estaba inscrito. Lanza Course.DoesNotExist si el curso no existe.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        sql = self.ENROLL_SQL.format(
+            enrollment=connection.ops.quote_name(self.model._meta.db_table),
+            course=connection.ops.quote_name(Course._meta.db_table),
+        )
+        params = {
+            "user_id": user.pk,
+            "course_id": course_id,
+            "status": status,
+            "active": int(status == Enrollment.STATUS_ACTIVE),
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+
+        if row is None:
+            # Camino poco frecuente: averiguar si el curso existe.
+            title = Course.objects.filter(pk=course_id).values_list("title", flat=True).first()
+            if title is None:
+                raise Course.DoesNotExist(course_id)
+            return None, title
+
+        pk, enrolled_at, updated_at, title = row
+        enrollment = self.model(
+            id=pk, user=user, course_id=course_id, status=status, progress=0,
+            completed_lessons=0, enrolled_at=enrolled_at, updated_at=updated_at,
+        )
+        enrollment._state.adding = False
+        enrollment._state.db = connection.alias
+        enrollment._remember_tracked_fields()
+        return enrollment, title
+
+
+class Enrollment(TrackedFieldsMixin, models.Model):
     STATUS_ACTIVE = "active"
     STATUS_COMPLETED = "completed"
     STATUS_CANCELED = "canceled"
@@ -56,15 +256,48 @@ class Enrollment(models.Model):
         default=STATUS_ACTIVE,
     ) 
     progress = models.IntegerField(default=0)
+    completed_lessons = models.PositiveIntegerField(default=0)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EnrollmentManager()
+
+    tracked_fields = ("course_id", "status")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "course"], name="unique_enrollment"),
+        ]
+        indexes = [
+            models.Index(fields=["-enrolled_at", "-id"], name="enrollment_enrolled_idx"),
+            models.Index(fields=["updated_at"], name="enrollment_updated_idx"),
+            models.Index(fields=["course", "enrolled_at"], name="enrollment_course_day_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} @ {self.course.title}"
 
 
-class Comment(models.Model):
+class CommentQuerySet(models.QuerySet):
+
+    def rating_summary(self):
+        """
+        Media, total y cuántos comentarios hay con cada nota (1-5), en una
+        sola consulta. Los comentarios sin nota no cuentan.
+        """
+        counts = self.aggregate(
+            average=models.Avg("rating"),
+            **{str(stars): models.Count("pk", filter=models.Q(rating=stars)) for stars in range(1, 6)},
+        )
+        average = counts.pop("average")
+        return {
+            "average": round(average, 2) if average is not None else None,
+            "count": sum(counts.values()),
+            "histogram": counts,
+        }
+
+
+class Comment(TrackedFieldsMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="comments")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     body = models.TextField()
@@ -72,5 +305,197 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    tracked_fields = ("course_id", "rating")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="comment_created_idx"),
+            # Feed por curso; con `rating` incluida, el histograma se calcula
+            # solo con el índice.
+            models.Index(fields=["course", "-created_at", "-id"], include=["rating"], name="comment_course_created_idx"),
+            models.Index(fields=["updated_at"], name="comment_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.user.username} on {self.course.title}"
+
+
+class LessonProgress(models.Model):
+    """
+    Avance de un usuario en una lección: segundos vistos y fecha de
+    finalización. Se escribe por lotes desde lms_api.progress.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="lesson_progress")
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="progress")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    seconds_watched = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "lesson"], name="unique_lesson_progress"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "course"], name="lesson_progress_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ lesson {self.lesson_id}"
+
+
+class OutboxEmail(models.Model):
+    """
+    Correo pendiente de envío. Se escribe en la misma transacción que lo
+    origina y lo entrega en segundo plano el comando `send_outbox`.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
+
+class CourseRecommendation(models.Model):
+    """
+    Vecino precalculado de un curso ("los estudiantes también se inscribieron
+    en"). Lo escribe el comando `compute_recommendations`; servirlo es una
+    lectura por (course, rank).
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="recommendations")
+    related = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    shared = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course", "rank"], name="unique_recommendation_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class WatermarkManager(models.Manager):
+    # Margen hacia atrás al leer desde la marca, por el desfase entre el reloj
+    # de la aplicación (que pone updated_at) y el de PostgreSQL. Las
+    # transacciones lentas las cubre visible_position().
+    overlap = timedelta(minutes=1)
+
+    def position(self, name):
+        return self.filter(name=name).values_list("position", flat=True).first()
+
+    def since(self, name):
+        """
+        Desde dónde releer en la próxima ejecución, o None si nunca se ejecutó.
+        """
+        position = self.position(name)
+        return position - self.overlap if position is not None else None
+
+    def advance(self, name, position):
+        self.update_or_create(name=name, defaults={"position": position})
+
+    def visible_position(self):
+        """
+        Hasta dónde es seguro avanzar la marca: ahora, o el inicio de la
+        transacción con escrituras abierta más antigua si es anterior. Sus
+        filas aún no se ven, pero su updated_at no puede ser anterior a ese
+        inicio, así que la próxima ejecución las leerá aunque confirme tarde.
+        """
+        now = timezone.now()
+        with connections[router.db_for_write(self.model)].cursor() as cursor:
+            cursor.execute(
+                "SELECT min(xact_start) FROM pg_stat_activity "
+                "WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid()"
+            )
+            oldest = cursor.fetchone()[0]
+        return min(now, oldest) if oldest else now
+
+
+class Watermark(models.Model):
+    """
+    Hasta dónde ha procesado un trabajo incremental (p. ej. las
+    inscripciones modificadas antes de `position`).
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = WatermarkManager()
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
+
+
+class CourseDailyStats(models.Model):
+    """
+    Resumen diario de un curso para su instructor, mantenido por
+    `rollup_course_stats`. Las inscripciones se agrupan por día de alta
+    (con su estado actual) y las notas por día del comentario.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    canceled = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course", "date"], name="unique_course_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} @ {self.date}"
+
+    @property
+    def completion_rate(self):
+        if not self.enrollments:
+            return None
+        return round(self.completed / self.enrollments, 4)
+
+    @property
+    def rating_average(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
+
+class StaleCourseDay(models.Model):
+    """
+    (curso, día) de CourseDailyStats que hay que recalcular aunque ninguna
+    fila con ese curso tenga un updated_at nuevo: el de una inscripción o
+    comentario borrado, o el curso anterior de uno movido. Lo escriben las
+    señales y lo consume `rollup_course_stats`.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f"Comment by {self.user.username} on {self.course.title}"
\ No newline at end of file
+        return f"{self.course_id} @ {self.date}"
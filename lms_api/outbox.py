@@ -0,0 +1,80 @@
+"""
+Bandeja de salida de correos (outbox).
+
+Las vistas y señales solo insertan filas en OutboxEmail; el comando
+`send_outbox` las entrega por lotes reutilizando una sola conexión SMTP
+y reintenta los fallos con espera exponencial.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """
+    Encola un correo. Si hay una transacción abierta, el correo solo
+    existirá si esa transacción se confirma.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    base = getattr(settings, "OUTBOX_RETRY_BACKOFF", 30)
+    limit = getattr(settings, "OUTBOX_RETRY_MAX_DELAY", 3600)
+    return datetime.timedelta(seconds=min(base * 2 ** (attempts - 1), limit))
+
+
+def deliver_batch(connection, batch_size=50, max_attempts=5):
+    """
+    Envía hasta `batch_size` correos vencidos y devuelve cuántos procesó.
+
+    Las filas se bloquean con SKIP LOCKED, así que varios workers pueden
+    trabajar en paralelo sin enviar dos veces el mismo correo.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not emails:
+            return 0
+
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients,
+                connection=connection,
+            )
+            try:
+                connection.open()  # No hace nada si ya está abierta.
+                message.send()
+            except Exception as exc:
+                email.attempts += 1
+                email.last_error = f"{type(exc).__name__}: {exc}"
+                if email.attempts >= max_attempts:
+                    email.status = OutboxEmail.STATUS_FAILED
+                else:
+                    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                # La conexión puede haber quedado inutilizable; el siguiente envío la reabre.
+                connection.close()
+            else:
+                email.attempts += 1
+                email.status = OutboxEmail.STATUS_SENT
+                email.sent_at = timezone.now()
+                email.last_error = ""
+
+        OutboxEmail.objects.bulk_update(
+            emails, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+        )
+    return len(emails)
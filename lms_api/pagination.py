@@ -0,0 +1,228 @@
+"""
+Paginación por cursor (keyset) para el feed AJAX y los ViewSets.
+
+En lugar de OFFSET se filtra por la posición (campo de orden, id) de la
+última fila entregada, así que cualquier página cuesta lo mismo que la
+primera mientras exista un índice sobre esas columnas.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    """
+    El token de cursor recibido no se puede decodificar.
+    """
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, datetime.date):
+        return ["d", value.isoformat()]
+    if isinstance(value, (int, float)):
+        return ["n", value]
+    return ["s", str(value)]
+
+
+def _decode_value(tag, raw):
+    if tag == "dt":
+        return datetime.datetime.fromisoformat(raw)
+    if tag == "d":
+        return datetime.date.fromisoformat(raw)
+    if tag == "n":
+        if not isinstance(raw, (int, float)):
+            raise TypeError(raw)
+        return raw
+    if tag == "s":
+        return str(raw)
+    raise ValueError(tag)
+
+
+def encode_cursor(value, pk, reverse=False):
+    """
+    Genera un token opaco con la posición (valor, id) y la dirección.
+    """
+    payload = {"p": _encode_value(value), "id": pk}
+    if reverse:
+        payload["r"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Devuelve (valor, id, reverse) a partir de un token de encode_cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        value = _decode_value(*payload["p"])
+        pk = int(payload["id"])
+        return value, pk, bool(payload.get("r"))
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor(token)
+
+
+class KeysetPage:
+    def __init__(self, results, next_cursor, previous_cursor):
+        self.results = results
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def _position(row, field):
+    if isinstance(row, dict):
+        return row[field], row["id"]
+    return getattr(row, field), row.pk
+
+
+def _keyset_queryset(queryset, field, cursor, page_size):
+    reverse = False
+    if cursor:
+        value, pk, reverse = decode_cursor(cursor)
+        lookup = "gt" if reverse else "lt"
+        queryset = queryset.filter(
+            Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"pk__{lookup}": pk})
+        )
+
+    if reverse:
+        queryset = queryset.order_by(field, "pk")
+    else:
+        queryset = queryset.order_by(f"-{field}", "-pk")
+    return queryset[: page_size + 1], reverse
+
+
+def _keyset_page(rows, field, cursor, reverse, page_size):
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows, None, None)
+
+    first = _position(rows[0], field)
+    last = _position(rows[-1], field)
+    if reverse:
+        # Venimos de una página posterior, así que siempre hay siguiente.
+        next_cursor = encode_cursor(*last)
+        previous_cursor = encode_cursor(*first, reverse=True) if has_more else None
+    else:
+        next_cursor = encode_cursor(*last) if has_more else None
+        previous_cursor = encode_cursor(*first, reverse=True) if cursor else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_keyset(queryset, field, cursor=None, page_size=20):
+    """
+    Devuelve una página de `queryset` ordenada de forma descendente por
+    (field, id). Acepta querysets de modelos o de `.values()` (que deben
+    incluir `field` e `id`).
+    """
+    queryset, reverse = _keyset_queryset(queryset, field, cursor, page_size)
+    return _keyset_page(list(queryset), field, cursor, reverse, page_size)
+
+
+async def apaginate_keyset(queryset, field, cursor=None, page_size=20):
+    """
+    Versión asíncrona de paginate_keyset (ORM asíncrono).
+    """
+    queryset, reverse = _keyset_queryset(queryset, field, cursor, page_size)
+    return _keyset_page([row async for row in queryset], field, cursor, reverse, page_size)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginador de DRF basado en paginate_keyset.
+    Cada ViewSet puede indicar su columna de orden con `keyset_field`;
+    los resultados de búsqueda se paginan por relevancia (`search_rank`).
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    default_keyset_field = "created_at"
+
+    def get_keyset_field(self, queryset, view):
+        if "search_rank" in queryset.query.annotations:
+            return "search_rank"
+        return getattr(view, "keyset_field", self.default_keyset_field)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        field = self.get_keyset_field(queryset, view)
+        try:
+            self.page = paginate_keyset(
+                queryset,
+                field,
+                cursor=request.query_params.get(self.cursor_query_param),
+                page_size=self.get_page_size(request),
+            )
+        except InvalidCursor:
+            raise NotFound("Cursor inválido.")
+        return self.page.results
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Token de cursor devuelto en next/previous.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Número de resultados por página.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,158 @@
+"""
+Ingesta de eventos de progreso por lección.
+
+Los clientes acumulan eventos ("watched" con segundos vistos, "completed")
+y los envían en lote. Aquí se fusionan por lección y se escriben con un
+bulk_create + un bulk_update; el avance de la inscripción se ajusta de forma
+incremental con el número de lecciones recién completadas y
+Course.lesson_count, sin recorrer todas las lecciones del curso. Cuando
+cambia el número de lecciones de un curso, recompute_course_progress vuelve
+a calcular el avance de sus inscripciones desde LessonProgress.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least, NullIf
+from django.utils import timezone
+
+from .counters import enrollment_contribution, move_contribution
+from .models import Course, Enrollment, Lesson, LessonProgress
+
+EVENT_WATCHED = "watched"
+EVENT_COMPLETED = "completed"
+
+
+def coalesce_events(events):
+    """
+    Fusiona eventos por lección: suma los segundos y marca si alguno la completó.
+    """
+    merged = {}
+    for event in events:
+        entry = merged.setdefault(event["lesson"], {"seconds": 0, "completed": False})
+        entry["seconds"] += event.get("seconds", 0)
+        if event["type"] == EVENT_COMPLETED:
+            entry["completed"] = True
+    return merged
+
+
+def enrollment_progress(completed_lessons, lesson_count):
+    if not lesson_count:
+        return 0
+    return min(100, completed_lessons * 100 // lesson_count)
+
+
+def recompute_course_progress(course_ids):
+    """
+    Recalcula completed_lessons y progress de las inscripciones de
+    `course_ids` con un UPDATE, a partir de las lecciones completadas que
+    quedan y del lesson_count actual (p. ej. tras crear o borrar lecciones).
+    """
+    completed = Coalesce(
+        Subquery(
+            LessonProgress.objects.filter(
+                user_id=OuterRef("user_id"), course_id=OuterRef("course_id"), completed_at__isnull=False
+            )
+            .order_by()
+            .values("course_id")
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+    lesson_count = Subquery(
+        Course.objects.filter(pk=OuterRef("course_id")).values("lesson_count"),
+        output_field=IntegerField(),
+    )
+    return Enrollment.objects.filter(course_id__in=course_ids).update(
+        completed_lessons=completed,
+        progress=Coalesce(Least(completed * 100 / NullIf(lesson_count, 0), 100), 0),
+    )
+
+
+def record_progress(user, events):
+    """
+    Aplica un lote de eventos validados del usuario y devuelve un resumen.
+    Se ignoran lecciones inexistentes o de cursos sin inscripción vigente.
+    """
+    merged = coalesce_events(events)
+    lesson_courses = dict(Lesson.objects.filter(pk__in=merged).values_list("pk", "course_id"))
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Bloquear las inscripciones serializa los lotes concurrentes del mismo usuario.
+        enrollments = {
+            enrollment.course_id: enrollment
+            for enrollment in Enrollment.objects.select_for_update()
+            .filter(user=user, course_id__in=set(lesson_courses.values()))
+            .exclude(status=Enrollment.STATUS_CANCELED)
+            .only("id", "course_id", "status", "progress", "completed_lessons")
+        }
+        accepted = [pk for pk, course_id in lesson_courses.items() if course_id in enrollments]
+        existing = {
+            progress.lesson_id: progress
+            for progress in LessonProgress.objects.filter(user=user, lesson_id__in=accepted)
+        }
+
+        to_create, to_update, newly_completed = [], [], Counter()
+        for lesson_id in accepted:
+            event = merged[lesson_id]
+            course_id = lesson_courses[lesson_id]
+            progress = existing.get(lesson_id)
+            if progress is None:
+                progress = LessonProgress(user=user, lesson_id=lesson_id, course_id=course_id)
+                to_create.append(progress)
+            else:
+                to_update.append(progress)
+
+            progress.seconds_watched += event["seconds"]
+            progress.updated_at = now
+            if event["completed"] and progress.completed_at is None:
+                progress.completed_at = now
+                newly_completed[course_id] += 1
+
+        LessonProgress.objects.bulk_create(to_create, batch_size=500)
+        LessonProgress.objects.bulk_update(
+            to_update, ["seconds_watched", "completed_at", "updated_at"], batch_size=500
+        )
+
+        lesson_counts = dict(
+            Course.objects.filter(pk__in=newly_completed).values_list("pk", "lesson_count")
+        )
+        changed = []
+        for course_id, count in newly_completed.items():
+            enrollment = enrollments[course_id]
+            lesson_count = lesson_counts.get(course_id, 0)
+            enrollment.completed_lessons += count
+            enrollment.progress = enrollment_progress(enrollment.completed_lessons, lesson_count)
+            enrollment.updated_at = now
+            if (
+                enrollment.status == Enrollment.STATUS_ACTIVE
+                and lesson_count
+                and enrollment.completed_lessons >= lesson_count
+            ):
+                enrollment.status = Enrollment.STATUS_COMPLETED
+                move_contribution(
+                    course_id, enrollment_contribution(Enrollment.STATUS_ACTIVE),
+                    course_id, enrollment_contribution(Enrollment.STATUS_COMPLETED),
+                )
+            changed.append(enrollment)
+
+        Enrollment.objects.bulk_update(
+            changed, ["completed_lessons", "progress", "status", "updated_at"]
+        )
+
+    return {
+        "lessons": len(accepted),
+        "ignored": sorted(set(merged) - set(accepted)),
+        "enrollments": [
+            {
+                "course": enrollment.course_id,
+                "completed_lessons": enrollment.completed_lessons,
+                "progress": enrollment.progress,
+                "status": enrollment.status,
+            }
+            for enrollment in changed
+        ],
+    }
@@ -0,0 +1,157 @@
+"""
+Recomendaciones "los estudiantes también se inscribieron en" a partir de la
+co-ocurrencia de inscripciones.
+
+Las inscripciones (sin las canceladas) se cargan como una matriz dispersa
+usuario × curso A. La co-ocurrencia de un grupo de cursos T con todos los
+demás es A[:, T]ᵀ · A, y la puntuación de cada par es la similitud coseno
+compartidos / √(inscritos_i · inscritos_j). Solo se guardan los K mejores
+vecinos de cada curso en CourseRecommendation.
+
+En modo incremental solo se recalculan los cursos cuyos vecinos pueden
+haber cambiado. Un curso con inscripciones creadas o modificadas desde la
+última ejecución (Watermark sobre Enrollment.updated_at) cambia su
+popularidad, y con ella la puntuación que tiene como vecino de cualquier
+curso con el que comparta estudiantes; se recalculan todos esos. La matriz
+se carga solo con los usuarios inscritos en ellos, y la popularidad de cada
+columna sale de un COUNT sobre toda la tabla. Los borrados no dejan rastro,
+así que conviene un recálculo completo periódico.
+"""
+import itertools
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from scipy import sparse
+
+from .models import Course, CourseRecommendation, Enrollment, Watermark
+
+WATERMARK = "course_recommendations"
+
+
+def top_k():
+    return getattr(settings, "RECOMMENDATIONS_TOP_K", 10)
+
+
+def min_shared():
+    return getattr(settings, "RECOMMENDATIONS_MIN_SHARED", 2)
+
+
+def enrollment_matrix(courses=None):
+    """
+    Devuelve (A, ids de curso por columna, inscritos por columna) con A en
+    formato CSC. Con `courses` (ids o subconsulta), A solo tiene las filas
+    de los usuarios inscritos en alguno de esos cursos, con todas sus
+    inscripciones; los inscritos por columna siguen siendo los de toda la
+    tabla, que es lo que necesita la similitud coseno.
+    """
+    enrollments = Enrollment.objects.exclude(status=Enrollment.STATUS_CANCELED).order_by()
+    selected = enrollments
+    if courses is not None:
+        selected = enrollments.filter(user_id__in=enrollments.filter(course_id__in=courses).values("user_id"))
+    rows = selected.values_list("user_id", "course_id").iterator(chunk_size=10000)
+    pairs = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+    user_ids, users = np.unique(pairs[:, 0], return_inverse=True)
+    course_ids, courses = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csc_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (users, courses)),
+        shape=(len(user_ids), len(course_ids)),
+    )
+    if courses is None:
+        popularity = np.asarray(matrix.sum(axis=0)).ravel()
+    else:
+        counts = dict(
+            enrollments.filter(course_id__in=selected.values("course_id"))
+            .values("course_id")
+            .annotate(n=Count("pk"))
+            .values_list("course_id", "n")
+        )
+        popularity = np.array([counts[course_id] for course_id in course_ids.tolist()], dtype=np.float32)
+    return matrix, course_ids, popularity
+
+
+def neighbours(matrix, popularity, columns, k, minimum):
+    """
+    Para cada columna de `columns` devuelve [(columna vecina, puntuación,
+    compartidos), ...] con los k vecinos de mayor puntuación.
+    """
+    co = (matrix[:, columns].T @ matrix).tocsr()
+    result = {}
+    for row, column in enumerate(columns):
+        start, end = co.indptr[row], co.indptr[row + 1]
+        others, shared = co.indices[start:end], co.data[start:end]
+        keep = (others != column) & (shared >= minimum)
+        others, shared = others[keep], shared[keep]
+        scores = shared / np.sqrt(popularity[column] * popularity[others])
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            others, shared, scores = others[best], shared[best], scores[best]
+        order = np.lexsort((others, -scores))
+        result[column] = [(others[i], float(scores[i]), int(shared[i])) for i in order]
+    return result
+
+
+def affected_courses(since):
+    """
+    Cursos con inscripciones creadas o modificadas desde `since` y todos los
+    que comparten algún usuario con ellos (sus posibles vecinos).
+    """
+    changed = Enrollment.objects.filter(updated_at__gte=since).values("course_id")
+    users = Enrollment.objects.filter(course_id__in=changed).values("user_id")
+    return set(
+        Enrollment.objects.filter(user_id__in=users).order_by().values_list("course_id", flat=True).distinct()
+    )
+
+
+def compute_recommendations(full=False, k=None, minimum=None, batch_size=500):
+    """
+    Recalcula las recomendaciones (todas o solo las afectadas desde la
+    última ejecución) y avanza la marca. Devuelve (cursos, filas escritas).
+    """
+    k = top_k() if k is None else k
+    minimum = min_shared() if minimum is None else minimum
+    started = Watermark.objects.visible_position()
+    since = None if full else Watermark.objects.since(WATERMARK)
+
+    if since is None:
+        targets = set(Course.objects.values_list("pk", flat=True))
+        matrix, course_ids, popularity = enrollment_matrix()
+    else:
+        targets = affected_courses(since)
+        matrix, course_ids, popularity = enrollment_matrix(sorted(targets))
+    column_of = {course_id: column for column, course_id in enumerate(course_ids.tolist())}
+    targets = sorted(targets)
+    written = 0
+    for start in range(0, len(targets), batch_size):
+        batch = targets[start:start + batch_size]
+        columns = [column_of[course_id] for course_id in batch if course_id in column_of]
+        found = neighbours(matrix, popularity, columns, k, minimum) if columns else {}
+        recommendations = [
+            CourseRecommendation(
+                course_id=int(course_ids[column]), related_id=int(course_ids[other]),
+                rank=rank, score=score, shared=shared,
+            )
+            for column, items in found.items()
+            for rank, (other, score, shared) in enumerate(items, start=1)
+        ]
+        with transaction.atomic():
+            CourseRecommendation.objects.filter(course_id__in=batch).delete()
+            CourseRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+        written += len(recommendations)
+
+    Watermark.objects.advance(WATERMARK, started)
+    return len(targets), written
+
+
+def related_courses(course_id, limit=None):
+    """
+    Vecinos guardados de un curso, en orden, con el curso ya cargado.
+    """
+    queryset = (
+        CourseRecommendation.objects.filter(course_id=course_id)
+        .select_related("related")
+        .defer("related__search_vector")
+        .order_by("rank")
+    )
+    return queryset[:limit] if limit else queryset
@@ -0,0 +1,124 @@
+"""
+Enrutado entre la base de datos primaria y las réplicas de solo lectura.
+
+Por defecto todo va al primario: comandos, workers y cualquier código fuera
+de una petición. ReplicaRoutingMiddleware habilita las réplicas solo para las
+lecturas de peticiones seguras (GET, HEAD, OPTIONS) de un cliente que no ha
+escrito hace poco. Lo que cuenta como escritura es que el router haya enviado
+algo al primario (db_for_write), sea cual sea el método: un GET como
+activate_account o el logout también escribe. Desde ese momento el resto de
+la petición lee del primario y se deja una cookie durante
+REPLICA_STICKY_SECONDS para que el mismo navegador siga leyendo de él
+mientras la réplica se pone al día (read-your-writes).
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "lms_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _RequestState:
+    """
+    Estado de la petición en curso. Es mutable a propósito: sync_to_async
+    copia el contexto, pero la copia apunta al mismo objeto, así que una
+    escritura hecha en el hilo de una vista asíncrona también se ve aquí.
+    """
+    __slots__ = ("use_replicas", "wrote")
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+_request_state = ContextVar("lms_replica_state", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+class PrimaryReplicaRouter:
+    """
+    Lecturas a una réplica al azar cuando la petición lo permite; escrituras,
+    migraciones y lecturas dentro de una transacción, al primario.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or not state.use_replicas or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases contienen los mismos datos.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide por petición si las lecturas pueden ir a una réplica y marca al
+    cliente tras una escritura. Igual que MetricsMiddleware, funciona en modo
+    síncrono y asíncrono.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = _RequestState(self.can_use_replicas(request))
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.finish(request, response, state)
+        return response
+
+    async def __acall__(self, request):
+        state = _RequestState(self.can_use_replicas(request))
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.finish(request, response, state)
+        return response
+
+    def can_use_replicas(self, request):
+        return request.method in SAFE_METHODS and STICKY_COOKIE not in request.COOKIES
+
+    def finish(self, request, response, state):
+        # Aunque la respuesta sea un error, lo escrito puede haberse confirmado.
+        if state.wrote and sticky_seconds() > 0:
+            response.set_cookie(
+                STICKY_COOKIE, "1", max_age=sticky_seconds(), httponly=True, samesite="Lax",
+                secure=request.is_secure(),
+            )
@@ -0,0 +1,193 @@
+"""
+Búsqueda de texto completo en PostgreSQL para cursos y lecciones.
+
+Cada fila guarda un tsvector ponderado (columna `search_vector`, con índice
+GIN) que se recalcula al guardar. El diccionario de stemming se elige a
+partir de `Course.language`, y la consulta de cada fila tiene que usar ese
+mismo diccionario: una búsqueda con stemming en español no encuentra las
+palabras de un vector construido en inglés.
+"""
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import Case, CharField, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Lower, Trim
+from django.db.models.lookups import In
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_CONFIGS = {
+    "es": "spanish",
+    "español": "spanish",
+    "spanish": "spanish",
+    "en": "english",
+    "inglés": "english",
+    "english": "english",
+    "pt": "portuguese",
+    "portugués": "portuguese",
+    "fr": "french",
+    "francés": "french",
+    "it": "italian",
+    "de": "german",
+}
+
+
+def search_config(language):
+    """
+    Devuelve la configuración de PostgreSQL (diccionario) para un idioma.
+    Los idiomas desconocidos usan 'simple', que no aplica stemming.
+    """
+    return SEARCH_CONFIGS.get((language or "").strip().lower(), "simple")
+
+
+def search_config_case(language_field):
+    """
+    search_config() en SQL, sobre la columna de idioma `language_field`.
+    """
+    language = Lower(Trim(language_field))
+    by_config = defaultdict(list)
+    for key, config in SEARCH_CONFIGS.items():
+        by_config[config].append(key)
+    return Case(
+        *[When(In(language, keys), then=Value(config)) for config, keys in by_config.items()],
+        default=Value("simple"),
+        output_field=CharField(),
+    )
+
+
+def course_search_vector(config):
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("subtitle", weight="B", config=config)
+        + SearchVector("description", weight="C", config=config)
+        + SearchVector("what_you_will_learn", weight="D", config=config)
+    )
+
+
+def lesson_search_vector(config):
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("content", weight="C", config=config)
+    )
+
+
+def update_course_search_vector(course):
+    from .models import Course
+
+    Course.objects.filter(pk=course.pk).update(
+        search_vector=course_search_vector(search_config(course.language))
+    )
+
+
+def update_lesson_search_vectors(lessons, language):
+    """
+    Recalcula el vector de un queryset de lecciones del mismo idioma
+    con un solo UPDATE.
+    """
+    lessons.update(search_vector=lesson_search_vector(search_config(language)))
+
+
+def reindex_lessons(lesson_ids):
+    """
+    Recalcula el vector de varias lecciones (p. ej. tras un bulk_create, que
+    no dispara señales) con un UPDATE por idioma.
+    """
+    from .models import Lesson
+
+    by_language = defaultdict(list)
+    for pk, language in Lesson.objects.filter(pk__in=lesson_ids).values_list("pk", "course__language"):
+        by_language[language].append(pk)
+    for language, pks in by_language.items():
+        update_lesson_search_vectors(Lesson.objects.filter(pk__in=pks), language)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Filtro de DRF que reemplaza a SearchFilter (`?search=`).
+
+    Filtra con el índice GIN, ordena por relevancia (`search_rank`) y añade
+    un fragmento resaltado (`search_headline`) del campo que indique la
+    vista en `search_headline_field`.
+
+    Cada fila se consulta con el diccionario de su idioma, que la vista
+    indica en `search_language_field` (p. ej. "course__language"). Con
+    `?language=` solo se buscan las filas de ese diccionario; sin él, las de
+    todos, cada una con el suyo.
+    """
+    search_param = "search"
+    language_param = "language"
+    vector_field = "search_vector"
+
+    def get_search_terms(self, request):
+        return request.query_params.get(self.search_param, "").strip()
+
+    def get_configs(self, request):
+        language = request.query_params.get(self.language_param)
+        if language:
+            return [search_config(language)]
+        return sorted(set(SEARCH_CONFIGS.values()) | {"simple"})
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        language_field = getattr(view, "search_language_field", "language")
+        queries = {
+            config: SearchQuery(terms, config=config, search_type="websearch")
+            for config in self.get_configs(request)
+        }
+        queryset = queryset.annotate(search_config_name=search_config_case(language_field))
+        matches = Q()
+        for config, query in queries.items():
+            matches |= Q(search_config_name=config, **{self.vector_field: query})
+        queryset = queryset.filter(matches).annotate(
+            # float8 para que el valor viaje sin pérdida en los cursores.
+            search_rank=Cast(
+                self.by_config(queries, lambda config, query: SearchRank(F(self.vector_field), query)),
+                FloatField(),
+            ),
+        )
+
+        headline_field = getattr(view, "search_headline_field", None)
+        if headline_field:
+            queryset = queryset.annotate(
+                search_headline=self.by_config(
+                    queries,
+                    lambda config, query: SearchHeadline(
+                        headline_field,
+                        query,
+                        config=config,
+                        start_sel="<mark>",
+                        stop_sel="</mark>",
+                        max_words=35,
+                        min_words=15,
+                    ),
+                ),
+            )
+        return queryset.order_by("-search_rank", "-pk")
+
+    def by_config(self, queries, build):
+        """
+        Expresión que aplica `build(config, query)` con el diccionario de cada fila.
+        """
+        if len(queries) == 1:
+            return build(*next(iter(queries.items())))
+        return Case(*[When(search_config_name=config, then=build(config, query)) for config, query in queries.items()])
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Términos de búsqueda de texto completo.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.language_param,
+                "required": False,
+                "in": "query",
+                "description": "Buscar solo en los contenidos de este idioma.",
+                "schema": {"type": "string"},
+            },
+        ]
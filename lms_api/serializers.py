@@ -1,8 +1,119 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User  # <-- IMPORTANTE
-from .models import Profile, Course, Lesson, Enrollment, Comment
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from .avatars import rendition_urls, validate_avatar_upload
+from .bulk import PreloadedPrimaryKeyRelatedField
+from .models import (
+    Profile, Course, CourseDailyStats, CourseRecommendation, Lesson, Enrollment, Comment, LessonProgress,
+)
+from .progress import EVENT_COMPLETED, EVENT_WATCHED
 
-class UserSerializer(serializers.ModelSerializer):
+# Columnas de Course que se precargan en los lotes (idioma para el índice de
+# búsqueda y dueño para los permisos).
+COURSE_PRELOAD_ONLY = ("id", "language", "owner")
+
+
+class QueryPlanMixin:
+    """
+    Construye el queryset óptimo para los campos del serializer:
+    - campos del modelo -> only()
+    - serializers anidados sobre FK/OneToOne -> select_related() (recursivo)
+    - relaciones a muchos -> prefetch_related()
+
+    Lo que no se puede deducir (propiedades, SerializerMethodField) se
+    declara en `Meta.query_requires = {"campo": ["columna", ...]}`.
+    """
+
+    def optimize_queryset(self, queryset, extra_fields=()):
+        select, prefetch, only = set(), set(), set(extra_fields)
+        self._plan_query(self, queryset.model, "", select, prefetch, only)
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset.only(*sorted(only))
+
+    @classmethod
+    def _plan_query(cls, serializer, model, prefix, select, prefetch, only):
+        only.add(prefix + model._meta.pk.name)
+        requires = getattr(getattr(serializer, "Meta", None), "query_requires", {})
+
+        for name, field in serializer.fields.items():
+            for column in requires.get(name, ()):
+                only.add(prefix + column)
+            if field.source == "*" or not field.source_attrs:
+                continue
+
+            source = field.source_attrs[0]
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+
+            path = prefix + source
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.add(path)
+            elif isinstance(field, serializers.BaseSerializer) and model_field.is_relation:
+                if model_field.concrete:
+                    only.add(path)
+                select.add(path)
+                cls._plan_query(field, model_field.related_model, path + "__", select, prefetch, only)
+            elif model_field.concrete:
+                only.add(path)
+
+
+class SparseFieldsMixin:
+    """
+    Campos a demanda:
+    - `?fields=id,title` devuelve solo esos campos (solo en lecturas).
+    - Los campos de `Meta.expandable_fields` (datos anidados) solo se
+      incluyen con `?expand=campo` o si se piden en `?fields=`.
+    Los parámetros se leen únicamente en el serializer raíz; también se
+    pueden pasar como argumentos `fields=`/`expand=` al construirlo.
+    Combinado con QueryPlanMixin, las columnas no pedidas ni siquiera se leen.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._only_fields = fields
+        self._expand = expand
+
+    def _is_root(self):
+        parent = getattr(self, "parent", None)
+        if isinstance(parent, serializers.ListSerializer):
+            parent = getattr(parent, "parent", None)
+        return parent is None
+
+    def _query_list(self, name):
+        request = self.context.get("request")
+        if request is None or not self._is_root():
+            return None
+        raw = request.query_params.get(name)
+        if not raw:
+            return None
+        return [item.strip() for item in raw.split(",") if item.strip()]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        only = self._only_fields
+        if only is None and request is not None and request.method in ("GET", "HEAD", "OPTIONS"):
+            only = self._query_list("fields")
+        expand = set(self._expand or self._query_list("expand") or ())
+        if only:
+            expand.update(only)
+
+        for name in getattr(self.Meta, "expandable_fields", ()):
+            if name not in expand:
+                fields.pop(name, None)
+
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
+
+
+class UserSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -10,54 +121,156 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "date_joined"]
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class AvatarField(serializers.ImageField):
+    """
+    ImageField que valida tamaño y dimensiones antes de que Pillow lea la imagen entera.
+    """
+
+    def to_internal_value(self, data):
+        if hasattr(data, "size"):
+            try:
+                validate_avatar_upload(data)
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError(exc.messages)
+        return super().to_internal_value(data)
+
+
+class ProfileSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
     bio = serializers.CharField(max_length=200, allow_blank=True, required=False)
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     user_info = UserSerializer(source="user", read_only=True)
+    avatar = AvatarField(required=False, allow_null=True)
+    avatar_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
-        fields = ["id", "user", "user_info", "name", "role", "bio", "avatar", "created_at", "updated_at"]
-        read_only_fields = ["id", "user", "created_at"]
+        fields = [
+            "id", "user", "user_info", "name", "role", "bio", "avatar", "avatar_status", "avatar_urls",
+            "created_at", "updated_at",
+        ]
+        read_only_fields = ["id", "user", "avatar_status", "created_at"]
+        expandable_fields = ["user_info"]
+        query_requires = {"avatar_urls": ["avatar_renditions"]}
 
+    def get_avatar_urls(self, profile):
+        """
+        URLs de las miniaturas por lado ({"64": {"webp", "jpeg"}, ...});
+        vacío mientras el avatar está pendiente.
+        """
+        return rendition_urls(profile.avatar_renditions, self.context.get("request"))
 
-class CourseSerializer(serializers.ModelSerializer):
+
+class CourseSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
     owner = serializers.PrimaryKeyRelatedField(read_only=True)
     owner_info = UserSerializer(source="owner", read_only=True)
+    rating_average = serializers.FloatField(read_only=True)
+    search_headline = serializers.SerializerMethodField()
 
     class Meta:
         model = Course
         fields = [
             "id","owner","owner_info","title","subtitle","description","level","language","category",
             "what_you_will_learn","requirements","target_audience","price","duration_hours","created_at",
+            "enrollment_count","active_count","lesson_count","rating_count","rating_average",
+            "search_headline",
+        ]
+        read_only_fields = [
+            "id","owner","created_at","enrollment_count","active_count","lesson_count","rating_count",
         ]
-        read_only_fields = ["id","owner","created_at"]
+        query_requires = {"rating_average": ["rating_sum", "rating_count"]}
+        expandable_fields = ["owner_info"]
 
+    def get_search_headline(self, obj):
+        """
+        Fragmento resaltado de la descripción cuando se usa ?search=.
+        """
+        return getattr(obj, "search_headline", None)
 
-class LessonSerializer(serializers.ModelSerializer):
-    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    def validate_price(self, value):
+        if value < 0:
+            raise serializers.ValidationError("price no puede ser negativo.")
+        return value
+
+    def validate_duration_hours(self, value):
+        if value < 0:
+            raise serializers.ValidationError("duration_hours no puede ser negativo.")
+        return value
+
+
+class CourseRecommendationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    course = CourseSerializer(source="related", read_only=True)
+
+    class Meta:
+        model = CourseRecommendation
+        fields = ["course", "score", "shared"]
+
+
+class LessonSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
+    course = PreloadedPrimaryKeyRelatedField(queryset=Course.objects.all(), preload_only=COURSE_PRELOAD_ONLY)
+    search_headline = serializers.SerializerMethodField()
 
     class Meta:
         model = Lesson
-        fields = ["id", "course", "title", "content", "video_url", "created_at", "updated_at"]
+        fields = ["id", "course", "title", "content", "video_url", "created_at", "updated_at", "search_headline"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def get_search_headline(self, obj):
+        return getattr(obj, "search_headline", None)
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+
+class EnrollmentSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     user_info = UserSerializer(source="user", read_only=True)
-    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    course = PreloadedPrimaryKeyRelatedField(queryset=Course.objects.all(), preload_only=COURSE_PRELOAD_ONLY)
     status = serializers.ChoiceField(choices=["active", "completed", "canceled"], default="active")
 
     class Meta:
         model = Enrollment
         fields = [
-            "id","user","user_info","course","status","progress","enrolled_at","updated_at",
+            "id","user","user_info","course","status","progress","completed_lessons","enrolled_at","updated_at",
         ]
-        read_only_fields = ["id","user","enrolled_at","updated_at"]
+        read_only_fields = ["id","user","progress","completed_lessons","enrolled_at","updated_at"]
+        expandable_fields = ["user_info"]
+
+
+class CohortEnrollmentSerializer(EnrollmentSerializer):
+    """
+    Inscripción de otro usuario (carga masiva de una cohorte).
+    Solo el instructor del curso o un administrador pueden hacerla.
+    """
+    user = PreloadedPrimaryKeyRelatedField(queryset=User.objects.all(), preload_only=("id",))
+
+    class Meta(EnrollmentSerializer.Meta):
+        read_only_fields = ["id","progress","completed_lessons","enrolled_at","updated_at"]
+        # La unicidad (usuario, curso) se comprueba para todo el lote a la vez.
+        validators = []
 
+    def validate(self, attrs):
+        request = self.context["request"]
+        if not request.user.is_staff and attrs["course"].owner_id != request.user.pk:
+            raise serializers.ValidationError("Solo el instructor del curso puede inscribir a otros usuarios.")
+        return attrs
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class LessonProgressSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = LessonProgress
+        fields = ["id", "lesson", "course", "seconds_watched", "completed_at", "updated_at"]
+        read_only_fields = fields
+
+
+class ProgressEventSerializer(serializers.Serializer):
+    """
+    Evento de progreso enviado por el reproductor. `seconds` es lo visto
+    desde el último evento de esa lección.
+    """
+    lesson = serializers.IntegerField(min_value=1)
+    type = serializers.ChoiceField(choices=[EVENT_WATCHED, EVENT_COMPLETED])
+    seconds = serializers.IntegerField(min_value=0, max_value=6 * 60 * 60, default=0)
+
+
+class CommentSerializer(SparseFieldsMixin, QueryPlanMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     user_info = UserSerializer(source="user", read_only=True) 
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
@@ -66,6 +279,7 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ["id", "course", "user", "user_info", "body", "rating", "created_at", "updated_at"]
         read_only_fields = ["id", "user", "created_at", "updated_at"]
+        expandable_fields = ["user_info"]
 
     def validate_rating(self, value):
         if value is None:
@@ -73,3 +287,15 @@ class CommentSerializer(serializers.ModelSerializer):
         if not (1 <= value <= 5):
             raise serializers.ValidationError("rating debe estar entre 1 y 5.")
         return value
+
+
+class CourseDailyStatsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    completion_rate = serializers.FloatField(read_only=True)
+    rating_average = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = CourseDailyStats
+        fields = [
+            "course", "date", "enrollments", "completed", "canceled", "completion_rate",
+            "rating_count", "rating_average",
+        ]
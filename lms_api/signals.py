@@ -1,16 +1,31 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
-from django.conf import settings
+from django.contrib.sites.models import Site
 
-from allauth.socialaccount.models import SocialAccount
+from allauth.socialaccount.models import SocialAccount, SocialApp
+
+from .analytics import mark_stale_day
+from .auth_providers import clear_provider_cache
+from .caching import bump_catalogue_version, bump_course_versions
+from .counters import (
+    comment_contribution, enrollment_contribution, lesson_contribution, move_contribution,
+)
+from .models import Comment, Course, Enrollment, Lesson
+from .outbox import queue_email
+from .progress import recompute_course_progress
+from .search import update_course_search_vector, update_lesson_search_vectors
+
+COURSE_SEARCH_FIELDS = {"title", "subtitle", "description", "what_you_will_learn", "language"}
+LESSON_SEARCH_FIELDS = {"title", "content", "course", "course_id"}
 
 
 @receiver(post_save, sender=User)
 def send_activation_email(sender, instance, created, **kwargs):
     """
-    Envía correo de activación cuando el usuario se registra manualmente.
+    Encola el correo de activación cuando el usuario se registra manualmente.
+    El envío real lo hace el worker `send_outbox`.
     """
     if not created:
         return
@@ -32,12 +47,186 @@ def send_activation_email(sender, instance, created, **kwargs):
         "Equipo LMS"
     )
 
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [instance.email],
-        fail_silently=False,
+    queue_email(subject, message, [instance.email])
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, update_fields=None, **kwargs):
+    """
+    Mantiene al día el vector de búsqueda del curso.
+    Si cambió el idioma también se reindexan sus lecciones.
+    """
+    if kwargs.get("raw"):
+        return
+    if update_fields and not COURSE_SEARCH_FIELDS.intersection(update_fields):
+        return
+
+    update_course_search_vector(instance)
+
+    if instance.has_changed("language") and not kwargs.get("created"):
+        update_lesson_search_vectors(
+            Lesson.objects.filter(course_id=instance.pk), instance.language
+        )
+
+
+@receiver(post_save, sender=Lesson)
+def index_lesson(sender, instance, update_fields=None, **kwargs):
+    """
+    Mantiene al día el vector de búsqueda de la lección.
+    """
+    if kwargs.get("raw"):
+        return
+    if update_fields and not LESSON_SEARCH_FIELDS.intersection(update_fields):
+        return
+
+    update_lesson_search_vectors(
+        Lesson.objects.filter(pk=instance.pk), instance.course.language
     )
 
 
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_catalogue(sender, instance, **kwargs):
+    """
+    Cambia la versión del catálogo y la del curso para que las respuestas y
+    los fragmentos de plantilla cacheados caduquen. Una lección movida de
+    curso invalida también el anterior.
+
+    Se hace al confirmar la transacción: si no, otra petición podría volver
+    a cachear las filas viejas con la versión nueva antes del commit.
+    """
+    if sender is Course:
+        courses = {instance.pk}
+    else:
+        courses = {instance.course_id, instance.loaded_value("course_id", instance.course_id)}
+    transaction.on_commit(bump_catalogue_version)
+    transaction.on_commit(lambda: bump_course_versions(courses))
+
+
+@receiver(post_save, sender=SocialApp)
+@receiver(post_delete, sender=SocialApp)
+@receiver(m2m_changed, sender=SocialApp.sites.through)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_auth_providers(sender, **kwargs):
+    """
+    Descarta la configuración de login social cacheada en este proceso.
+    """
+    clear_provider_cache()
+
+
+# ---------------------------
+#  CONTADORES DE CURSO
+# ---------------------------
+
+# Al borrar un curso (o su dueño) Django borra en cascada sus inscripciones,
+# lecciones y comentarios antes que el curso; no tiene sentido actualizar los
+# contadores de una fila que va a desaparecer. Los cursos del borrado se
+# anotan en `origin`, el objeto (instancia o queryset) que lo inició y que
+# Django pasa a todas las señales de la cascada: si el borrado falla, la
+# marca no afecta a ningún otro.
+DELETING_COURSES_ATTR = "_lms_deleting_courses"
+
+
+@receiver(pre_delete, sender=Course)
+def mark_course_deleting(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        return
+    deleting = getattr(origin, DELETING_COURSES_ATTR, None)
+    if deleting is None:
+        deleting = set()
+        setattr(origin, DELETING_COURSES_ATTR, deleting)
+    deleting.add(instance.pk)
+
+
+def uncount(course_id, old, origin=None):
+    """
+    Resta la contribución `old` del curso, salvo que el curso se esté
+    borrando en la misma cascada. Devuelve si se aplicó.
+    """
+    if course_id in getattr(origin, DELETING_COURSES_ATTR, ()):
+        return False
+    move_contribution(course_id, old, None, {})
+    return True
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    """
+    Actualiza enrollment_count/active_count del curso al crear o modificar una inscripción.
+    """
+    if kwargs.get("raw"):
+        return
+
+    new = enrollment_contribution(instance.status)
+    if created:
+        move_contribution(None, {}, instance.course_id, new)
+        return
+
+    old_course_id = instance.loaded_value("course_id", instance.course_id)
+    old = enrollment_contribution(instance.loaded_value("status", instance.status))
+    move_contribution(old_course_id, old, instance.course_id, new)
+    if old_course_id != instance.course_id:
+        mark_stale_day(old_course_id, instance.enrolled_at)
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, origin=None, **kwargs):
+    course_id = instance.loaded_value("course_id", instance.course_id)
+    old = enrollment_contribution(instance.loaded_value("status", instance.status))
+    if uncount(course_id, old, origin):
+        mark_stale_day(course_id, instance.enrolled_at)
+
+
+@receiver(post_save, sender=Lesson)
+def count_lesson(sender, instance, created, **kwargs):
+    """
+    Actualiza lesson_count al crear una lección o moverla a otro curso, y
+    con él el avance de las inscripciones.
+    """
+    if kwargs.get("raw"):
+        return
+
+    old_course_id = None if created else instance.loaded_value("course_id", instance.course_id)
+    old = {} if created else lesson_contribution()
+    move_contribution(old_course_id, old, instance.course_id, lesson_contribution())
+    if old_course_id != instance.course_id:
+        recompute_course_progress({old_course_id, instance.course_id} - {None})
+
+
+@receiver(post_delete, sender=Lesson)
+def uncount_lesson(sender, instance, origin=None, **kwargs):
+    course_id = instance.loaded_value("course_id", instance.course_id)
+    if uncount(course_id, lesson_contribution(), origin):
+        # El LessonProgress de la lección ya se borró en cascada.
+        recompute_course_progress([course_id])
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    """
+    Actualiza rating_sum/rating_count del curso según la calificación del comentario.
+    """
+    if kwargs.get("raw"):
+        return
+
+    new = comment_contribution(instance.rating)
+    if created:
+        move_contribution(None, {}, instance.course_id, new)
+        return
+
+    old_course_id = instance.loaded_value("course_id", instance.course_id)
+    old = comment_contribution(instance.loaded_value("rating", instance.rating))
+    move_contribution(old_course_id, old, instance.course_id, new)
+    if old_course_id != instance.course_id:
+        mark_stale_day(old_course_id, instance.created_at)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, origin=None, **kwargs):
+    course_id = instance.loaded_value("course_id", instance.course_id)
+    old = comment_contribution(instance.loaded_value("rating", instance.rating))
+    if uncount(course_id, old, origin):
+        mark_stale_day(course_id, instance.created_at)
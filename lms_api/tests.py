@@ -1,3 +1,394 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models.signals import post_delete
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from .caching import catalogue_version, course_versions
+from .models import Comment, Course, Enrollment, Lesson
+from .pagination import paginate_keyset
+from .progress import record_progress
+
+
+def make_course(owner, **kwargs):
+    kwargs.setdefault("title", "Curso")
+    kwargs.setdefault("description", "Descripción")
+    kwargs.setdefault("level", "Principiante")
+    return Course.objects.create(owner=owner, **kwargs)
+
+
+def counters(course):
+    return Course.objects.filter(pk=course.pk).values(
+        "enrollment_count", "active_count", "lesson_count", "rating_sum", "rating_count"
+    ).get()
+
+
+class CourseCounterTests(TestCase):
+    """
+    Contadores desnormalizados de Course mantenidos por las señales.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("instructor")
+        cls.student = User.objects.create_user("estudiante")
+        cls.other_student = User.objects.create_user("otro")
+
+    def setUp(self):
+        self.course = make_course(self.owner)
+        self.other = make_course(self.owner, title="Otro curso")
+
+    def test_create_counts_each_row(self):
+        Enrollment.objects.create(user=self.student, course=self.course)
+        Enrollment.objects.create(user=self.other_student, course=self.course, status=Enrollment.STATUS_COMPLETED)
+        Lesson.objects.create(course=self.course, title="Lección", content="texto")
+        Comment.objects.create(course=self.course, user=self.student, body="bien", rating=4)
+        Comment.objects.create(course=self.course, user=self.other_student, body="sin nota")
+
+        self.assertEqual(counters(self.course), {
+            "enrollment_count": 2, "active_count": 1, "lesson_count": 1, "rating_sum": 4, "rating_count": 1,
+        })
+
+    def test_status_and_rating_changes_apply_the_difference(self):
+        enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        comment = Comment.objects.create(course=self.course, user=self.student, body="bien", rating=2)
+
+        enrollment.status = Enrollment.STATUS_CANCELED
+        enrollment.save()
+        comment.rating = 5
+        comment.save()
+
+        values = counters(self.course)
+        self.assertEqual((values["enrollment_count"], values["active_count"]), (1, 0))
+        self.assertEqual((values["rating_sum"], values["rating_count"]), (5, 1))
+
+    def test_move_between_courses(self):
+        enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        lesson = Lesson.objects.create(course=self.course, title="Lección", content="texto")
+        comment = Comment.objects.create(course=self.course, user=self.student, body="bien", rating=3)
+
+        for obj in (enrollment, lesson, comment):
+            obj.course = self.other
+            obj.save()
+
+        empty = {"enrollment_count": 0, "active_count": 0, "lesson_count": 0, "rating_sum": 0, "rating_count": 0}
+        self.assertEqual(counters(self.course), empty)
+        self.assertEqual(counters(self.other), {
+            "enrollment_count": 1, "active_count": 1, "lesson_count": 1, "rating_sum": 3, "rating_count": 1,
+        })
+
+    def test_delete_subtracts(self):
+        enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        lesson = Lesson.objects.create(course=self.course, title="Lección", content="texto")
+        comment = Comment.objects.create(course=self.course, user=self.student, body="bien", rating=3)
+
+        enrollment.delete()
+        lesson.delete()
+        comment.delete()
+
+        self.assertEqual(counters(self.course), {
+            "enrollment_count": 0, "active_count": 0, "lesson_count": 0, "rating_sum": 0, "rating_count": 0,
+        })
+
+    def test_lesson_moved_then_deleted_decrements_its_current_course(self):
+        lesson = Lesson.objects.create(course=self.course, title="Lección", content="texto")
+        lesson.course = self.other
+        lesson.save()
+        lesson.delete()
+
+        self.assertEqual(counters(self.course)["lesson_count"], 0)
+        self.assertEqual(counters(self.other)["lesson_count"], 0)
+
+    def test_course_cascade_skips_counter_updates(self):
+        Enrollment.objects.create(user=self.student, course=self.course)
+        Lesson.objects.create(course=self.course, title="Lección", content="texto")
+        Comment.objects.create(course=self.course, user=self.student, body="bien", rating=3)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.course.delete()
+
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "lms_api_course"')]
+        self.assertEqual(updates, [])
+
+    def test_failed_course_delete_does_not_suppress_later_decrements(self):
+        enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        Enrollment.objects.create(user=self.other_student, course=self.course)
+        Lesson.objects.create(course=self.course, title="Lección", content="texto")
+
+        def fail(sender, **kwargs):
+            raise RuntimeError("fallo simulado")
+
+        post_delete.connect(fail, sender=Lesson)
+        try:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Course.objects.get(pk=self.course.pk).delete()
+        finally:
+            post_delete.disconnect(fail, sender=Lesson)
+
+        enrollment.delete()
+        self.assertEqual(counters(self.course)["enrollment_count"], 1)
+
+
+class EnrollTests(TestCase):
+    """
+    Enrollment.objects.enroll: un único INSERT ... ON CONFLICT DO NOTHING.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("instructor")
+        cls.student = User.objects.create_user("estudiante", password="secreto")
+        cls.course = make_course(cls.owner)
+
+    def test_second_enroll_is_a_noop(self):
+        enrollment, title = Enrollment.objects.enroll(self.student, self.course.pk)
+        self.assertIsNotNone(enrollment)
+        self.assertEqual(title, self.course.title)
+
+        again, title = Enrollment.objects.enroll(self.student, self.course.pk)
+        self.assertIsNone(again)
+        self.assertEqual(title, self.course.title)
+        self.assertEqual(Enrollment.objects.filter(user=self.student, course=self.course).count(), 1)
+        self.assertEqual(counters(self.course)["enrollment_count"], 1)
+
+    def test_missing_course(self):
+        with self.assertRaises(Course.DoesNotExist):
+            Enrollment.objects.enroll(self.student, 0)
+
+    def test_unique_constraint(self):
+        Enrollment.objects.create(user=self.student, course=self.course)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Enrollment.objects.create(user=self.student, course=self.course)
+
+    def test_ajax_enroll_twice(self):
+        self.client.force_login(self.student)
+        url = reverse("ajax_enroll_course")
+        headers = {"X-Requested-With": "XMLHttpRequest"}
+
+        body = {"course_id": self.course.pk}
+        first = self.client.post(url, body, content_type="application/json", headers=headers)
+        second = self.client.post(url, body, content_type="application/json", headers=headers)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(Enrollment.objects.filter(user=self.student, course=self.course).count(), 1)
+
+
+class BulkLessonTests(TestCase):
+    """
+    /api/lessons/bulk/: escribe sin señales y deja la invalidación de la
+    caché para después del commit.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("instructor")
+        cls.course = make_course(cls.owner)
+        cls.other = make_course(cls.owner, title="Otro curso")
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_create_bumps_versions_on_commit(self):
+        catalogue, course = catalogue_version(), course_versions([self.course.pk])[self.course.pk]
+        items = [{"course": self.course.pk, "title": f"Lección {i}", "content": "texto"} for i in range(3)]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse("lesson-bulk"), items, content_type="application/json")
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(catalogue_version(), catalogue)
+            self.assertEqual(course_versions([self.course.pk])[self.course.pk], course)
+
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalogue_version(), catalogue)
+        self.assertNotEqual(course_versions([self.course.pk])[self.course.pk], course)
+        self.assertEqual(counters(self.course)["lesson_count"], 3)
+
+    def test_update_moving_a_lesson_bumps_both_courses(self):
+        lesson = Lesson.objects.create(course=self.course, title="Lección", content="texto")
+        before = course_versions([self.course.pk, self.other.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("lesson-bulk"), [{"id": lesson.pk, "course": self.other.pk}], content_type="application/json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        after = course_versions([self.course.pk, self.other.pk])
+        self.assertNotEqual(after[self.course.pk], before[self.course.pk])
+        self.assertNotEqual(after[self.other.pk], before[self.other.pk])
+        self.assertEqual((counters(self.course)["lesson_count"], counters(self.other)["lesson_count"]), (0, 1))
+
+    def test_invalid_item_writes_nothing(self):
+        items = [{"course": self.course.pk, "title": "Bien", "content": "texto"}, {"course": self.course.pk}]
+
+        response = self.client.post(reverse("lesson-bulk"), items, content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["index"], 1)
+        self.assertFalse(Lesson.objects.filter(course=self.course).exists())
+
+
+class RecordProgressTests(TestCase):
+    """
+    lms_api.progress: ingesta de eventos por lotes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("instructor")
+        cls.student = User.objects.create_user("estudiante")
+        cls.course = make_course(cls.owner)
+        cls.lessons = [
+            Lesson.objects.create(course=cls.course, title=f"Lección {i}", content="texto") for i in range(4)
+        ]
+        cls.outside = Lesson.objects.create(course=make_course(cls.owner, title="Sin inscripción"), title="x", content="x")
+
+    def setUp(self):
+        self.enrollment, _ = Enrollment.objects.enroll(self.student, self.course.pk)
+
+    def completed(self, *lessons):
+        return [{"lesson": lesson.pk, "type": "completed"} for lesson in lessons]
+
+    def test_events_are_merged_and_unknown_courses_ignored(self):
+        summary = record_progress(self.student, [
+            {"lesson": self.lessons[0].pk, "type": "watched", "seconds": 30},
+            {"lesson": self.lessons[0].pk, "type": "watched", "seconds": 45},
+            {"lesson": self.lessons[0].pk, "type": "completed"},
+            {"lesson": self.outside.pk, "type": "completed"},
+        ])
+
+        self.assertEqual(summary["lessons"], 1)
+        self.assertEqual(summary["ignored"], [self.outside.pk])
+        progress = self.lessons[0].progress.get(user=self.student)
+        self.assertEqual(progress.seconds_watched, 75)
+        self.assertIsNotNone(progress.completed_at)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress), (1, 25))
+
+    def test_completing_twice_counts_once(self):
+        record_progress(self.student, self.completed(self.lessons[0]))
+        record_progress(self.student, self.completed(self.lessons[0]))
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+
+    def test_last_lesson_completes_the_enrollment(self):
+        record_progress(self.student, self.completed(*self.lessons))
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.status, Enrollment.STATUS_COMPLETED)
+        self.assertEqual(self.enrollment.progress, 100)
+        self.assertEqual(counters(self.course)["active_count"], 0)
+
+    def test_deleting_a_completed_lesson_recomputes_progress(self):
+        record_progress(self.student, self.completed(self.lessons[0], self.lessons[1]))
+
+        self.lessons[0].delete()
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress), (1, 33))
+
+    def test_viewset_update_keeps_progress(self):
+        self.client.force_login(self.student)
+        record_progress(self.student, self.completed(self.lessons[0]))
+        stale = Enrollment.objects.get(pk=self.enrollment.pk)
+        Enrollment.objects.filter(pk=stale.pk).update(completed_lessons=2, progress=50)
+
+        response = self.client.patch(
+            reverse("enrollment-detail", args=[stale.pk]), {"status": "canceled"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.status, self.enrollment.completed_lessons), ("canceled", 2))
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    paginate_keyset con empates en la columna de orden.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("instructor")
+        cls.courses = [make_course(owner, title=f"Curso {i}") for i in range(5)]
+        # Mismo created_at para todos: el orden lo decide el id.
+        Course.objects.update(created_at=timezone.now())
+
+    def test_pages_do_not_skip_or_repeat_rows_on_ties(self):
+        queryset = Course.objects.all()
+        first = paginate_keyset(queryset, "created_at", page_size=2)
+        second = paginate_keyset(queryset, "created_at", cursor=first.next_cursor, page_size=2)
+        third = paginate_keyset(queryset, "created_at", cursor=second.next_cursor, page_size=2)
+
+        seen = [course.pk for page in (first, second, third) for course in page.results]
+        self.assertEqual(seen, sorted((course.pk for course in self.courses), reverse=True))
+        self.assertIsNone(third.next_cursor)
+        self.assertIsNone(first.previous_cursor)
+
+    def test_previous_cursor_returns_the_same_page(self):
+        queryset = Course.objects.all()
+        first = paginate_keyset(queryset, "created_at", page_size=2)
+        second = paginate_keyset(queryset, "created_at", cursor=first.next_cursor, page_size=2)
+        back = paginate_keyset(queryset, "created_at", cursor=second.previous_cursor, page_size=2)
+
+        self.assertEqual([c.pk for c in back.results], [c.pk for c in first.results])
+        self.assertEqual(back.next_cursor, first.next_cursor)
+
+    def test_invalid_cursor_is_a_404(self):
+        self.client.force_login(User.objects.get(username="instructor"))
+        response = self.client.get(reverse("course-list"), {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseLookupTests(TestCase):
+    """
+    Acciones que consultan por course_id sin cargar el curso antes y caché
+    por curso de lesson_content.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("instructor")
+        cls.course = make_course(cls.owner)
+        cls.other = make_course(cls.owner, title="Otro curso")
+        cls.lesson = Lesson.objects.create(course=cls.course, title="Lección", content="texto")
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_non_numeric_pk_is_a_404(self):
+        for name in ("course-related", "course-comments"):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=["abc"]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_missing_course_is_a_404(self):
+        for name in ("course-related", "course-comments"):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=[0]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_lesson_content_checks_the_course_even_when_cached(self):
+        url = reverse("lesson_content", args=[self.course.pk, self.lesson.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        wrong = reverse("lesson_content", args=[self.other.pk, self.lesson.pk])
+        self.assertEqual(self.client.get(wrong).status_code, 404)
+
+    def test_lesson_move_invalidates_both_courses(self):
+        lesson = Lesson.objects.create(course=self.course, title="Otra", content="texto")
+        before = course_versions([self.course.pk, self.other.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.course = self.other
+            lesson.save()
+
+        after = course_versions([self.course.pk, self.other.pk])
+        self.assertNotEqual(after[self.course.pk], before[self.course.pk])
+        self.assertNotEqual(after[self.other.pk], before[self.other.pk])
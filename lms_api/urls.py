@@ -9,6 +9,8 @@ router.register(r'courses', views.CourseViewSet)
 router.register(r'lessons', views.LessonViewSet)
 router.register(r'enrollments', views.EnrollmentViewSet)
 router.register(r'comments', views.CommentViewSet)
+router.register(r'lesson-progress', views.LessonProgressViewSet)
+router.register(r'course-stats', views.CourseStatsViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
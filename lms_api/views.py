@@ -1,33 +1,59 @@
-from rest_framework import viewsets, permissions 
+import hmac
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
 from django.contrib.auth.models import User
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter
-from django.http import JsonResponse
-from django.core.mail import send_mail
 from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
 
-from .models import Profile, Course, Lesson, Enrollment, Comment
+from .models import Profile, Course, CourseDailyStats, Lesson, Enrollment, Comment, LessonProgress
 from .serializers import (
     UserSerializer, ProfileSerializer, CourseSerializer,
-    LessonSerializer, EnrollmentSerializer, CommentSerializer
+    LessonSerializer, EnrollmentSerializer, CohortEnrollmentSerializer, CommentSerializer,
+    LessonProgressSerializer, ProgressEventSerializer, CourseRecommendationSerializer,
+    CourseDailyStatsSerializer,
 )
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import aget_object_or_404, render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
+from .auth_providers import provider_login_url
+from .bulk import get_items, item_errors, preload_related, validate_items
+from .caching import (
+    CatalogueCacheMixin, acatalogue_key, acached_json_response, acourse_key, acourse_versions,
+    bump_catalogue_version, bump_course_versions, cached_json_response, catalogue_key, fragment_timeout,
+    request_fingerprint,
+)
+from .counters import enrollment_contribution, lesson_contribution, move_contribution
+from .exports import ExportMixin
+from .facets import course_facets
 from .forms import RegistroForm
-
-
-def google_enabled():
-    """
-    Verifica si el proveedor de Google está configurado en el sistema.
-    """
-    try:
-        from allauth.socialaccount.models import SocialApp
-        return SocialApp.objects.filter(provider='google').exists()
-    except:
-        return False
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from .outbox import queue_email
+from .pagination import InvalidCursor, apaginate_keyset
+from .progress import recompute_course_progress, record_progress
+from .recommendations import related_courses
+from .search import FullTextSearchFilter, reindex_lessons
+
+COURSE_FEED_PAGE_SIZE = 12
+RELATED_COURSES_SHOWN = 4
+
+# Columnas de Course que usa courses/detail.html.
+COURSE_DETAIL_FIELDS = (
+    "id", "owner", "title", "subtitle", "description", "level", "language", "category",
+    "what_you_will_learn", "requirements", "target_audience", "price", "duration_hours",
+    "created_at", "lesson_count",
+)
 
 
 def iniciar_sesion(request):
@@ -35,8 +61,9 @@ def iniciar_sesion(request):
     Vista para iniciar sesión con usuario y contraseña.
     Si las credenciales son correctas, se redirige al home.
     También muestra el botón para iniciar con Google si está configurado
+    (configuración cacheada, sin consultas en cada render).
     """
-    google_provider_enabled = google_enabled()
+    google_login_url = provider_login_url(request)
 
     if request.method == "POST":
         username = request.POST.get("username")
@@ -53,7 +80,7 @@ def iniciar_sesion(request):
     return render(
         request,
         "usuarios/login.html", 
-        {"google_provider_enabled": google_provider_enabled},
+        {"google_provider_enabled": google_login_url is not None, "google_login_url": google_login_url},
     )
 
 
@@ -62,7 +89,7 @@ def registro_view(request):
     Vista que muestra y procesa el formulario de registro.
     Crea un usuario nuevo y lo deja inactivo hasta que active su cuenta por correo.
     """
-    google_provider_enabled = google_enabled()
+    google_login_url = provider_login_url(request)
 
     if request.method == "POST":
         form = RegistroForm(request.POST)
@@ -70,7 +97,9 @@ def registro_view(request):
             user = form.save(commit=False)
             user.set_password(form.cleaned_data["password"])
             user.is_active = False 
-            user.save()
+            # El correo de activación se encola en la misma transacción.
+            with transaction.atomic():
+                user.save()
 
             messages.success(request, "Revisa tu correo para activar tu cuenta.")
             return redirect("login")
@@ -82,7 +111,8 @@ def registro_view(request):
 
     return render(request, "usuarios/registro.html", {
         "form": form,
-        "google_provider_enabled": google_provider_enabled
+        "google_provider_enabled": google_login_url is not None,
+        "google_login_url": google_login_url,
     })
 
 
@@ -118,43 +148,123 @@ def home(request):
     return render(request, "home.html")
 
 
-def list_courses_ajax(request):
+def metrics_view(request):
     """
-    Retorna todos los cursos en formato JSON.
-    Esta ruta es consumida por AJAX en el home.
+    Métricas por vista en formato de texto de Prometheus.
+    Solo para staff, o con `Authorization: Bearer <METRICS_TOKEN>` si está configurado.
     """
-    courses = Course.objects.all().values(
-        "id", "title", "description", "level", "language"
-    )
-    return JsonResponse(list(courses), safe=False)
+    token = getattr(settings, "METRICS_TOKEN", "")
+    header = request.headers.get("Authorization", "")
+    by_token = bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+    if not (by_token or request.user.is_staff):
+        return HttpResponse(status=403)
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+async def list_courses_ajax(request):
+    """
+    Retorna una página de cursos en formato JSON, del más reciente al más antiguo.
+    Esta ruta es consumida por AJAX en el home (scroll infinito): el token
+    `next` se envía de vuelta como `?cursor=` para pedir la página siguiente.
+    Las páginas se cachean por versión de catálogo y llevan ETag.
+    """
+    cursor = request.GET.get("cursor")
+
+    async def build_page():
+        courses = Course.objects.values(
+            "id", "title", "description", "level", "language", "created_at",
+            "enrollment_count", "lesson_count", "rating_sum", "rating_count",
+        )
+        page = await apaginate_keyset(courses, "created_at", cursor=cursor, page_size=COURSE_FEED_PAGE_SIZE)
+
+        for course in page.results:
+            rating_sum = course.pop("rating_sum")
+            course["rating_average"] = (
+                round(rating_sum / course["rating_count"], 2) if course["rating_count"] else None
+            )
+
+        return {
+            "results": page.results,
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        }
+
+    try:
+        key = await acatalogue_key("ajax_courses", request_fingerprint(request))
+        return await acached_json_response(request, key, build_page)
+    except InvalidCursor:
+        return JsonResponse({"error": "Cursor inválido"}, status=400)
 
 
 @login_required
-def my_courses(request):
+async def my_courses(request):
     """
     Muestra todos los cursos en los que el usuario está inscrito,
     junto con su progreso en cada uno.
     """
-    enrollments = Enrollment.objects.filter(user=request.user).select_related("course")
-    return render(request, "courses/my_courses.html", {"enrollments": enrollments})
+    user = await request.auser()
+    enrollments = [
+        enrollment
+        async for enrollment in Enrollment.objects.filter(user=user).select_related("course").only(
+            "id", "course", "progress",
+            "course__title", "course__subtitle", "course__description", "course__level", "course__language",
+        )
+    ]
+    # La tarjeta de cada curso se cachea por (curso, versión); el progreso no.
+    versions = await acourse_versions({enrollment.course_id for enrollment in enrollments})
+    for enrollment in enrollments:
+        enrollment.course_version = versions[enrollment.course_id]
+
+    context = {"enrollments": enrollments, "fragment_timeout": fragment_timeout()}
+    # render() toca request.user (context processors), que es síncrono.
+    return await sync_to_async(render)(request, "courses/my_courses.html", context)
 
 
 @login_required
-def course_detail(request, course_id):
+async def course_detail(request, course_id):
     """
     Vista con toda la información detallada del curso seleccionado.
-    También muestra si el usuario está inscrito o no.
-    """
-    course = get_object_or_404(Course, id=course_id)
-    lessons = course.lessons.all()
-    enrolled = Enrollment.objects.filter(user=request.user, course=course).exists()
+    También muestra si el usuario está inscrito o no (y su progreso).
+    Del temario solo se cargan los títulos; el contenido de cada lección se
+    pide a `lesson_content` al desplegarla. La información del curso se
+    cachea como fragmento por (curso, versión); inscripción y progreso se
+    renderizan siempre.
+    """
+    user = await request.auser()
+    course = await aget_object_or_404(
+        Course.objects.select_related("owner").only(*COURSE_DETAIL_FIELDS, "owner__username"), id=course_id
+    )
+    versions = await acourse_versions([course.id])
+    enrollment = await Enrollment.objects.filter(user=user, course=course).only("id", "progress").afirst()
+    related = [item.related async for item in related_courses(course.id, limit=RELATED_COURSES_SHOWN)]
 
     context = {
         "course": course,
-        "lessons": lessons,
-        "enrolled": enrolled,
+        "course_version": versions[course.id],
+        "fragment_timeout": fragment_timeout(),
+        # Sin evaluar: solo se consulta si el fragmento del temario no está en caché.
+        "lessons": course.lessons.only("id", "course", "title").order_by("created_at", "id"),
+        "enrolled": enrollment is not None,
+        "enrollment": enrollment,
+        "related_courses": related,
     }
-    return render(request, "courses/detail.html", context)
+    return await sync_to_async(render)(request, "courses/detail.html", context)
+
+
+@login_required
+async def lesson_content(request, course_id, lesson_id):
+    """
+    Contenido y video de una lección en JSON, para el temario de
+    course_detail. Se cachea por versión del curso y lleva ETag.
+    """
+    async def build():
+        lesson = await aget_object_or_404(
+            Lesson.objects.only("id", "content", "video_url"), id=lesson_id, course_id=course_id
+        )
+        return {"id": lesson.id, "content": lesson.content, "video_url": lesson.video_url}
+
+    key = await acourse_key(course_id, "lesson_content", lesson_id)
+    return await acached_json_response(request, key, build)
 
 
 import json
@@ -164,70 +274,62 @@ from django.views.decorators.http import require_POST
 @csrf_exempt
 @login_required
 @require_POST
-def enroll_course_ajax(request):
+async def enroll_course_ajax(request):
     """
     Endpoint AJAX para inscribirse en un curso.
+    La inscripción se hace con un único INSERT ... ON CONFLICT, así que dos
+    clics simultáneos no pueden crear inscripciones duplicadas.
     """
     if request.headers.get("X-Requested-With") != "XMLHttpRequest":
         return JsonResponse({"error": "Solicitud inválida"}, status=400)
 
     try:
         data = json.loads(request.body)
-        course_id = data.get("course_id")
-        course = Course.objects.get(id=course_id)
-
-        enrollment, created = Enrollment.objects.get_or_create(
-            user=request.user,
-            course=course,
-            defaults={"status": "active"}
-        )
-
-        if not created:
-            return JsonResponse({"error": "Ya estás inscrito en este curso"}, status=400)
-
-        return JsonResponse(
-            {"status": "ok", "course_title": course.title},
-            status=201
-        )
+        course_id = int(data.get("course_id"))
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"error": "Solicitud inválida"}, status=400)
 
+    user = await request.auser()
+    try:
+        enrollment, course_title = await sync_to_async(Enrollment.objects.enroll)(user, course_id)
     except Course.DoesNotExist:
         return JsonResponse({"error": "Curso no encontrado"}, status=404)
 
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+    if enrollment is None:
+        return JsonResponse({"error": "Ya estás inscrito en este curso"}, status=400)
+
+    return JsonResponse(
+        {"status": "ok", "course_title": course_title},
+        status=201
+    )
 
 
 def activate_account(request, user_id):
     """
     Activa la cuenta del usuario después de hacer clic en el enlace enviado por correo.
-    También envía un correo de bienvenida al activar la cuenta.
+    También encola un correo de bienvenida al activar la cuenta.
     """
     try:
         user = User.objects.get(id=user_id)
 
         if not user.is_active:
-            user.is_active = True
-            user.save()
-
-            # Enviar correo de bienvenida
-            if user.email:
-                subject = "¡Bienvenido a la plataforma!"
-                message = (
-                    f"Hola {user.username},\n\n"
-                    "Tu cuenta ha sido activada exitosamente.\n\n"
-                    "Ya puedes iniciar sesión y comenzar a explorar nuestros cursos.\n"
-                    "Estamos felices de que formes parte de esta comunidad.\n\n"
-                    "Saludos,\n"
-                    "Equipo LMS"
-                )
-
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    fail_silently=False,
-                )
+            with transaction.atomic():
+                user.is_active = True
+                user.save()
+
+                # Encolar correo de bienvenida
+                if user.email:
+                    subject = "¡Bienvenido a la plataforma!"
+                    message = (
+                        f"Hola {user.username},\n\n"
+                        "Tu cuenta ha sido activada exitosamente.\n\n"
+                        "Ya puedes iniciar sesión y comenzar a explorar nuestros cursos.\n"
+                        "Estamos felices de que formes parte de esta comunidad.\n\n"
+                        "Saludos,\n"
+                        "Equipo LMS"
+                    )
+
+                    queue_email(subject, message, [user.email])
 
         messages.success(request, "Tu cuenta ha sido activada. Ya puedes iniciar sesión.")
         return redirect("login")
@@ -241,16 +343,37 @@ def activate_account(request, user_id):
 #  VIEWSETS (APIs REST)
 # ---------------------------
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class QueryPlanViewSetMixin:
+    """
+    Aplica al queryset el plan de consultas (select_related/only) que
+    declara el serializer, para que los listados no hagan N+1.
+    La columna del cursor de paginación siempre se carga.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer()
+        if not hasattr(serializer, "optimize_queryset"):
+            return queryset
+
+        extra_fields = []
+        paginator = self.paginator
+        if hasattr(paginator, "get_keyset_field"):
+            extra_fields.append(paginator.get_keyset_field(queryset, self))
+        return serializer.optimize_queryset(queryset, extra_fields)
+
+
+class UserViewSet(QueryPlanViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API que permite ver usuarios (solo admin).
     """
     queryset = User.objects.all().order_by('-date_joined')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    keyset_field = 'date_joined'
 
 
-class ProfileViewSet(viewsets.ModelViewSet):
+class ProfileViewSet(QueryPlanViewSetMixin, viewsets.ModelViewSet):
     """
     API CRUD para perfiles de usuario.
     El perfil pertenece al usuario autenticado.
@@ -263,35 +386,186 @@ class ProfileViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ExportMixin, CatalogueCacheMixin, QueryPlanViewSetMixin, viewsets.ModelViewSet):
     """
     API CRUD para cursos.
     Permite buscar, filtrar y crear cursos.
+    Las lecturas (list/retrieve) se cachean por versión de catálogo con ETag.
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ['level', 'language']
-    search_fields = ['title', 'description']
+    search_headline_field = 'description'
+    search_language_field = 'language'
+    export_fields = (
+        'id', 'owner_id', 'title', 'level', 'language', 'category', 'price', 'duration_hours',
+        'enrollment_count', 'active_count', 'lesson_count', 'rating_sum', 'rating_count', 'created_at',
+    )
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-
-class LessonViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def facets(self, request):
+        """
+        Conteos por nivel, idioma, categoría y rangos de precio/duración
+        de los cursos que cumplen los filtros actuales (?level, ?language, ?search).
+        Se cachea por versión de catálogo.
+        """
+        queryset = self.filter_queryset(Course.objects.all())
+        key = catalogue_key("course_facets", request_fingerprint(request))
+        return cached_json_response(request, key, lambda: course_facets(queryset))
+
+    def _course_pk(self):
+        """
+        pk de la URL como entero, para las acciones que consultan por
+        course_id sin cargar antes el curso. Un pk no numérico es un 404.
+        """
+        try:
+            return int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (TypeError, ValueError):
+            raise NotFound()
+
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def related(self, request, pk=None):
+        """
+        Cursos en los que también se inscribieron los estudiantes de este,
+        precalculados por `compute_recommendations`.
+        """
+        recommendations = list(related_courses(self._course_pk()))
+        if not recommendations:
+            # Camino poco frecuente: 404 si el curso no existe.
+            self.get_object()
+        serializer = CourseRecommendationSerializer(
+            recommendations, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """
+        Comentarios del curso, del más reciente al más antiguo, con el autor
+        incluido y paginados por cursor. `rating` resume las notas de todos
+        los comentarios del curso (media y conteo por estrella).
+        """
+        comments = Comment.objects.filter(course_id=self._course_pk())
+        summary = comments.rating_summary()
+        context = self.get_serializer_context()
+        plan = CommentSerializer(context=context, expand=["user_info"])
+
+        page = self.paginate_queryset(plan.optimize_queryset(comments, ["created_at"]))
+        if not page and not summary["count"]:
+            # Camino poco frecuente: 404 si el curso no existe.
+            self.get_object()
+        serializer = CommentSerializer(page, many=True, context=context, expand=["user_info"])
+        response = self.get_paginated_response(serializer.data)
+        response.data["rating"] = summary
+        return response
+
+
+class LessonViewSet(QueryPlanViewSetMixin, viewsets.ModelViewSet):
     """
     API CRUD para lecciones de cada curso.
     """
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ['course']
-    search_fields = ['title', 'content']
+    search_headline_field = 'content'
+    search_language_field = 'course__language'
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Carga masiva de lecciones.
+        POST crea una lista de lecciones; PATCH actualiza una lista de
+        objetos con `id`. Todo o nada: si un elemento falla no se escribe
+        ninguno y se devuelven los errores por índice.
+        """
+        items = get_items(request.data)
+        context = self.get_serializer_context()
+        preload_related(LessonSerializer, items, context)
+
+        if request.method == 'POST':
+            return self._bulk_create(items, context)
+        return self._bulk_update(items, context)
+
+    def _bulk_create(self, items, context):
+        validated = validate_items(LessonSerializer, items, context)
+
+        with transaction.atomic():
+            lessons = Lesson.objects.bulk_create(
+                [Lesson(**serializer.validated_data) for serializer in validated],
+                batch_size=500,
+            )
+            # bulk_create no dispara señales: contadores, índice y caché a mano.
+            for course_id, count in Counter(lesson.course_id for lesson in lessons).items():
+                move_contribution(None, {}, course_id, {"lesson_count": count})
+            reindex_lessons([lesson.pk for lesson in lessons])
+            courses = {lesson.course_id for lesson in lessons}
+            recompute_course_progress(courses)
+            transaction.on_commit(bump_catalogue_version)
+            transaction.on_commit(lambda: bump_course_versions(courses))
+
+        data = LessonSerializer(lessons, many=True, context=context).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def _bulk_update(self, items, context):
+        ids, seen, errors = [], set(), {}
+        for index, item in enumerate(items):
+            pk = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                errors[index] = "Cada elemento debe incluir el `id` de la lección."
+                ids.append(None)
+                continue
+            if pk in seen:
+                errors[index] = "La lección aparece más de una vez en el lote."
+            ids.append(pk)
+            seen.add(pk)
+        if errors:
+            raise item_errors(errors)
+
+        found = Lesson.objects.in_bulk([pk for pk in ids if pk is not None])
+        errors = {index: "Lección no encontrada." for index, pk in enumerate(ids) if pk not in found}
+        if errors:
+            raise item_errors(errors)
+
+        instances = [found[pk] for pk in ids]
+        validated = validate_items(LessonSerializer, items, context, instances=instances, partial=True)
+
+        fields = {'updated_at'}
+        now = timezone.now()
+        for serializer in validated:
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+                fields.add(attr)
+            serializer.instance.updated_at = now
+
+        with transaction.atomic():
+            Lesson.objects.bulk_update(instances, sorted(fields), batch_size=500)
+            for lesson in instances:
+                move_contribution(
+                    lesson.loaded_value('course_id', lesson.course_id), lesson_contribution(),
+                    lesson.course_id, lesson_contribution(),
+                )
+            reindex_lessons(ids)
+            courses = {lesson.course_id for lesson in instances}
+            courses |= {lesson.loaded_value('course_id', lesson.course_id) for lesson in instances}
+            moved = [lesson for lesson in instances if lesson.has_changed('course_id')]
+            recompute_course_progress(
+                {lesson.course_id for lesson in moved} | {lesson.loaded_value('course_id') for lesson in moved}
+            )
+            transaction.on_commit(bump_catalogue_version)
+            transaction.on_commit(lambda: bump_course_versions(courses))
+
+        data = LessonSerializer(instances, many=True, context=context).data
+        return Response(data)
 
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(ExportMixin, QueryPlanViewSetMixin, viewsets.ModelViewSet):
     """
     API CRUD para inscripciones.
     Guarda al usuario autenticado como dueño de la inscripción.
@@ -299,18 +573,179 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['course', 'status', 'user']
+    keyset_field = 'enrolled_at'
+    export_fields = (
+        'id', 'user_id', 'user__username', 'course_id', 'course__title', 'status',
+        'progress', 'completed_lessons', 'enrolled_at', 'updated_at',
+    )
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        data = serializer.validated_data
+        enrollment, _ = Enrollment.objects.enroll(
+            self.request.user, data['course'].pk, status=data.get('status', Enrollment.STATUS_ACTIVE)
+        )
+        if enrollment is None:
+            raise ValidationError({'course': ["Ya estás inscrito en este curso."]})
+        serializer.instance = enrollment
+
+    def perform_update(self, serializer):
+        """
+        Guarda solo los campos enviados: progress y completed_lessons los
+        escribe record_progress, y un save() completo podría pisarlos.
+        """
+        enrollment = serializer.instance
+        for attr, value in serializer.validated_data.items():
+            setattr(enrollment, attr, value)
+        enrollment.save(update_fields=[*serializer.validated_data, 'updated_at'])
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Inscribe una cohorte completa en una sola petición.
+        Recibe una lista de {"user", "course", "status"?}; solo el instructor
+        del curso (o un admin) puede inscribir a otros usuarios.
+        """
+        items = get_items(request.data)
+        context = self.get_serializer_context()
+        preload_related(CohortEnrollmentSerializer, items, context)
+        validated = validate_items(CohortEnrollmentSerializer, items, context)
+
+        pairs = [
+            (serializer.validated_data['user'].pk, serializer.validated_data['course'].pk)
+            for serializer in validated
+        ]
+        existing = set(
+            Enrollment.objects.filter(
+                user_id__in={user_id for user_id, _ in pairs},
+                course_id__in={course_id for _, course_id in pairs},
+            ).values_list('user_id', 'course_id')
+        )
+        errors, seen = {}, set()
+        for index, pair in enumerate(pairs):
+            if pair in existing:
+                errors[index] = "El usuario ya está inscrito en este curso."
+            elif pair in seen:
+                errors[index] = "La inscripción aparece más de una vez en el lote."
+            seen.add(pair)
+        if errors:
+            raise item_errors(errors)
+
+        try:
+            with transaction.atomic():
+                enrollments = self._create_cohort(validated)
+        except IntegrityError:
+            # Otra petición inscribió a alguno de los usuarios mientras tanto.
+            return Response(
+                {'detail': "Alguna inscripción del lote ya existe; vuelve a intentarlo."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        data = CohortEnrollmentSerializer(enrollments, many=True, context=context).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def _create_cohort(self, validated):
+        enrollments = Enrollment.objects.bulk_create(
+            [Enrollment(**serializer.validated_data) for serializer in validated],
+            batch_size=500,
+        )
+        totals = {}
+        for enrollment in enrollments:
+            course_totals = totals.setdefault(enrollment.course_id, Counter())
+            course_totals.update(enrollment_contribution(enrollment.status))
+        for course_id, contribution in totals.items():
+            move_contribution(None, {}, course_id, dict(contribution))
+        return enrollments
+
+
+class CourseStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Estadísticas diarias de los cursos del instructor autenticado
+    (inscripciones, tasa de finalización y nota media por día).
+    Filtros: ?course=, ?date__gte=, ?date__lte=. Solo lee los resúmenes
+    que mantiene `rollup_course_stats`.
+    """
+    queryset = CourseDailyStats.objects.all()
+    serializer_class = CourseDailyStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {'course': ['exact'], 'date': ['gte', 'lte']}
+    keyset_field = 'date'
+
+    def get_queryset(self):
+        return super().get_queryset().filter(course__owner=self.request.user)
+
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def summary(self, request):
+        """
+        Totales por curso en el rango de fechas filtrado.
+        """
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values("course_id", "course__title")
+            .annotate(
+                enrollments=Sum("enrollments"), completed=Sum("completed"), canceled=Sum("canceled"),
+                rating_sum=Sum("rating_sum"), rating_count=Sum("rating_count"),
+            )
+            .order_by("course_id")
+        )
+        data = []
+        for row in rows:
+            stats = CourseDailyStats(**{
+                name: row[name] for name in ("enrollments", "completed", "canceled", "rating_sum", "rating_count")
+            })
+            data.append({
+                "course": row["course_id"],
+                "title": row["course__title"],
+                "enrollments": stats.enrollments,
+                "completed": stats.completed,
+                "canceled": stats.canceled,
+                "completion_rate": stats.completion_rate,
+                "rating_count": stats.rating_count,
+                "rating_average": stats.rating_average,
+            })
+        return Response(data)
+
+
+class LessonProgressViewSet(QueryPlanViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Progreso por lección del usuario autenticado.
+    `events/` recibe los eventos acumulados por el reproductor en un solo POST.
+    """
+    queryset = LessonProgress.objects.all()
+    serializer_class = LessonProgressSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['course', 'lesson']
+    keyset_field = 'updated_at'
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def events(self, request):
+        """
+        Recibe una lista de {"lesson", "type": "watched"|"completed", "seconds"}.
+        Los eventos se fusionan por lección antes de escribir.
+        """
+        items = get_items(request.data)
+        serializer = ProgressEventSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        summary = record_progress(request.user, serializer.validated_data)
+        return Response(summary)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ExportMixin, QueryPlanViewSetMixin, viewsets.ModelViewSet):
     """
     API CRUD para comentarios de cursos.
     """
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['course', 'rating']
+    export_fields = ('id', 'course_id', 'user_id', 'user__username', 'rating', 'body', 'created_at', 'updated_at')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (después de configurar Django)
+
+if settings.DEBUG:
+    # Con uvicorn no hay runserver que sirva los estáticos en desarrollo.
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'lms_api.apps.LMSApiConfig',
     'rest_framework',
     'drf_yasg',
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lms_api.metrics.MetricsMiddleware',
+    'lms_api.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +68,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'project.urls'
 
+# Sin 'loaders' explícitos Django envuelve los cargadores en
+# django.template.loaders.cached.Loader: cada plantilla se compila una vez por
+# proceso (con DEBUG se vuelve a leer si el archivo cambia). `bench_templates`
+# compara el render con y sin él.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -86,15 +93,65 @@ WSGI_APPLICATION = 'project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Pool de conexiones nativo de psycopg 3: cada proceso mantiene entre
+# DATABASE_POOL_MIN_SIZE y DATABASE_POOL_MAX_SIZE conexiones abiertas y las
+# presta por petición (también a las vistas asíncronas, que usan el ORM desde
+# hilos). Con DATABASE_POOL=False (p. ej. detrás de PgBouncer) se usan
+# conexiones persistentes durante CONN_MAX_AGE segundos.
+#
+# Comprobación de conexiones: sin pool, CONN_HEALTH_CHECKS hace que Django
+# pruebe la conexión persistente al empezar cada petición. Con pool, Django
+# se salta esa comprobación y en su lugar traduce CONN_HEALTH_CHECKS en
+# check=ConnectionPool.check_connection al crear el pool, que prueba cada
+# conexión al prestarla. Por eso 'check' no va en OPTIONS['pool']: Django
+# ya lo pasa y el pool fallaría con el argumento repetido.
+DATABASE_POOL = env.bool('DATABASE_POOL', default=True)
+
+
+def database_config(url):
+    config = env.db_url_config(url)
+    # Con pool equivale a 'check': ConnectionPool.check_connection (ver arriba).
+    config['CONN_HEALTH_CHECKS'] = True
+    if DATABASE_POOL:
+        # Se conservan las opciones de la URL (sslmode, connect_timeout...).
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+            'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10),
+            'max_idle': env.float('DATABASE_POOL_MAX_IDLE', default=300),
+        }
+    else:
+        config['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=60)
+    return config
+
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'mydatabase',
-        'USER': 'user',
-        'PASSWORD': 'password',
-        'HOST': 'db',
-    }
+    'default': database_config(env('DATABASE_URL', default='postgres://user:password@db:5432/mydatabase')),
+}
+
+# Réplicas de solo lectura (URLs separadas por comas). Las lecturas de las
+# peticiones GET/HEAD/OPTIONS van a una réplica; las escrituras y el resto
+# de lecturas (comandos, workers), al primario. Tras una escritura, el
+# navegador queda "pegado" al primario durante REPLICA_STICKY_SECONDS para
+# leer lo que acaba de escribir. Ver lms_api/routers.py.
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[]), start=1):
+    DATABASES[f'replica{index}'] = {**database_config(url), 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['lms_api.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=5)
+
+
+# Caché compartida. En docker compose CACHE_URL=redis://redis:6379/1; sin la
+# variable se usa memoria local (tests y despliegues sin Redis), que no se
+# comparte entre procesos. KEY_PREFIX separa entornos que usan el mismo Redis.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://lms'),
 }
+CACHES['default']['KEY_PREFIX'] = env('CACHE_KEY_PREFIX', default='lms-dev')
+
+# Sesiones leídas de la caché; la base de datos solo se toca al escribirlas
+# o cuando la entrada no está en caché.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 
 # Password validation
@@ -133,11 +190,52 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Archivos subidos por los usuarios (avatares y sus miniaturas).
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Avatares: límites que se comprueban al subir (sin decodificar la imagen)
+# y lados de las miniaturas cuadradas que genera `process_avatars`.
+AVATAR_MAX_UPLOAD_SIZE = env.int('AVATAR_MAX_UPLOAD_SIZE', default=5 * 1024 * 1024)
+AVATAR_MAX_DIMENSION = 4096
+AVATAR_RENDITION_SIZES = (64, 256)
+
+# Cursos relacionados (`compute_recommendations`): vecinos guardados por
+# curso y estudiantes en común mínimos para considerar un par.
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_MIN_SHARED = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'lms_api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+}
+
+# Máximo de elementos aceptados por los endpoints .../bulk/
+BULK_MAX_ITEMS = 1000
+
+# Segundos que vive una respuesta cacheada del catálogo. La versión de catálogo
+# las invalida al editar cursos/lecciones; el TTL acota cuánto pueden tardar
+# en reflejarse los contadores de inscripciones y rating.
+CATALOGUE_CACHE_TIMEOUT = 300
+
+# Segundos que viven los fragmentos de plantilla cacheados ({% cache %}) de
+# cada curso. Su clave incluye la versión del curso, que cambia al editarlo.
+TEMPLATE_FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Token opcional para que Prometheus lea /metrics sin sesión de staff
+# (cabecera `Authorization: Bearer <token>`). Vacío = solo staff.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# Segundos que cada proceso reutiliza la configuración de login social (SocialApp).
+# Los cambios se aplican al instante en el proceso que los hace y, en los demás,
+# como mucho tras este tiempo.
+AUTH_PROVIDERS_CACHE_TIMEOUT = 300
+
 ACCOUNT_REDIRECT_URL = "/home/"
 LOGIN_REDIRECT_URL = "/home/"
 
@@ -150,3 +248,8 @@ EMAIL_HOST_USER = env("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
 
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
+
+# Outbox de correos: espera inicial (segundos) antes de reintentar un envío
+# fallido; se duplica en cada intento hasta OUTBOX_RETRY_MAX_DELAY.
+OUTBOX_RETRY_BACKOFF = env.int("OUTBOX_RETRY_BACKOFF", default=30)
+OUTBOX_RETRY_MAX_DELAY = env.int("OUTBOX_RETRY_MAX_DELAY", default=3600)
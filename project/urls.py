@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from lms_api import views as my_views
@@ -24,8 +26,13 @@ urlpatterns = [
     path('ajax/enroll/', my_views.enroll_course_ajax, name='ajax_enroll_course'),
     path("activate/<int:user_id>/", my_views.activate_account, name="activate_account"),
     path('courses/<int:course_id>/', my_views.course_detail, name='course_detail'),
+    path('courses/<int:course_id>/lessons/<int:lesson_id>/content/', my_views.lesson_content, name='lesson_content'),
     path('api/', include("lms_api.urls")),
+    path('metrics', my_views.metrics_view, name='metrics'),
     path('accounts/', include('allauth.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)